@@ -0,0 +1,58 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+from itertools import islice
+
+from book.models import Book
+
+TITLE_WORDS = (
+    "shadow", "river", "empire", "garden", "silent", "winter", "machine",
+    "ocean", "forgotten", "crown", "night", "glass", "stone", "journey",
+    "kingdom", "secret", "iron", "summer", "storm", "city", "fire",
+    "mountain", "dream", "letter", "memory", "island", "wolf", "mirror",
+)
+FIRST_NAMES = (
+    "Anna", "Boris", "Clara", "Daniel", "Elena", "Frank", "Greta", "Henry",
+    "Irina", "James", "Kateryna", "Leo", "Maria", "Nikolai", "Olga", "Paul",
+)
+LAST_NAMES = (
+    "Adams", "Bennett", "Carter", "Dvorak", "Evans", "Fisher", "Garcia",
+    "Hughes", "Ivanenko", "Jensen", "Kowalski", "Lopez", "Miller", "Novak",
+)
+
+
+def generate_books(size, seed=0):
+    rng = random.Random(seed)
+
+    for i in range(size):
+        yield Book(
+            title=(
+                f"{rng.choice(TITLE_WORDS).capitalize()} "
+                f"{rng.choice(TITLE_WORDS)} {i}"
+            ),
+            author=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            cover=rng.choice(Book.CoverType.values),
+            inventory=rng.choice((0, 0, 1, 2, 3, 5, 10)),
+            daily_fee=Decimal(rng.randint(50, 2000)) / 100,
+        )
+
+
+def seed_catalog(size, batch_size=10000, seed=0):
+    """Insert ``size`` synthetic books without keeping them in memory."""
+    books = generate_books(size, seed=seed)
+
+    while batch := list(islice(books, batch_size)):
+        Book.objects.bulk_create(batch, batch_size=batch_size)
+
+
+def measure(func, repeat=5):
+    """Return the median wall time of ``func`` in milliseconds."""
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings)
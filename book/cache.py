@@ -0,0 +1,135 @@
+import hashlib
+import time
+import uuid
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+LIST_VERSION_KEY = "book:list:version"
+DETAIL_VERSION_KEY = "book:{pk}:version"
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_cache():
+    return caches[settings.BOOK_CACHE_ALIAS]
+
+
+def get_version(key):
+    """Return the current version of a group of cache keys."""
+    cache = get_cache()
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+
+    return version
+
+
+def invalidate_book_cache(*book_ids):
+    """Drop the cached book lists and the cached details of ``book_ids``.
+
+    The cached responses are not deleted one by one: the version of their
+    group changes, so the old keys are never read again and expire. Inside
+    a transaction it happens once more after the commit, because
+    a concurrent request could cache the old rows in the meantime.
+    """
+    keys = [LIST_VERSION_KEY] + [
+        DETAIL_VERSION_KEY.format(pk=book_id) for book_id in book_ids
+    ]
+
+    def invalidate():
+        get_cache().set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    invalidate()
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(invalidate)
+
+
+def request_fingerprint(request, path=None):
+    """Hash the request URL with the query params in a stable order.
+
+    The ``path`` is hashed instead of the request path when it is given.
+    """
+    if path is None:
+        path = request.path
+
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f"{request.scheme}://{request.get_host()}{path}?{query}"
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def list_cache_key(request):
+    version = get_version(LIST_VERSION_KEY)
+    return f"book:list:{version}:{request_fingerprint(request)}"
+
+
+def detail_cache_key(request, pk):
+    """Return the key of the book details, ``pk`` must be an int.
+
+    The path is left out of the fingerprint: the key holds the pk, and
+    the path may spell it differently, e.g. with leading zeros.
+    """
+    version = get_version(DETAIL_VERSION_KEY.format(pk=pk))
+    return f"book:{pk}:{version}:{request_fingerprint(request, path='')}"
+
+
+def wait_for(key):
+    deadline = time.monotonic() + LOCK_WAIT
+
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = get_cache().get(key)
+
+        if entry is not None:
+            return entry
+
+    return None
+
+
+def cached_response(key, get_response, timeout=None):
+    """Return the cached response data of ``key`` or build and cache it.
+
+    Only one process rebuilds a key at a time. When a fresh entry expires
+    the others keep serving the stale one until it is rebuilt, and when
+    there is no entry at all they wait for the rebuild for a while instead
+    of hitting the database all together.
+    """
+    cache = get_cache()
+    timeout = timeout or settings.BOOK_CACHE_TIMEOUT
+    lock_key = f"{key}:lock"
+    entry = cache.get(key)
+
+    if entry is not None and entry[1] > time.time():
+        return Response(entry[0])
+
+    locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+
+    if not locked:
+        if entry is None:
+            entry = wait_for(key)
+
+        if entry is not None:
+            return Response(entry[0])
+
+    try:
+        response = get_response()
+
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                (response.data, time.time() + timeout),
+                timeout * 2,
+            )
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+    return response
@@ -0,0 +1,115 @@
+from django.db.models import Count, Q
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from book.models import Book
+
+
+def parse_param(name, value, field):
+    """Return the query param validated by the serializer field or None"""
+    if not value:
+        return None
+
+    try:
+        return field.to_internal_value(value)
+    except ValidationError as error:
+        raise ValidationError({name: error.detail}) from error
+
+
+def get_decimal_param(params, name):
+    """Parse a bound of ``daily_fee``, in the range of the column"""
+    daily_fee = Book._meta.get_field("daily_fee")
+    return parse_param(
+        name,
+        params.get(name),
+        serializers.DecimalField(
+            max_digits=daily_fee.max_digits,
+            decimal_places=daily_fee.decimal_places,
+        ),
+    )
+
+
+class BookFilter:
+    """Filter the catalog and count the books of every facet value.
+
+    ``author`` and the ``daily_fee`` range narrow down the whole result,
+    while ``cover`` and ``available`` are facets: each of them is counted
+    with all the other filters applied but its own.
+    """
+
+    def __init__(self, params):
+        self.filters = Q()
+        self.facet_filters = {}
+
+        author = params.get("author")
+        cover = parse_param(
+            "cover",
+            params.get("cover", "").upper(),
+            serializers.ChoiceField(choices=Book.CoverType.values),
+        )
+        available = parse_param(
+            "available",
+            params.get("available"),
+            serializers.BooleanField(),
+        )
+        daily_fee_min = get_decimal_param(params, "daily_fee_min")
+        daily_fee_max = get_decimal_param(params, "daily_fee_max")
+
+        if author:
+            self.filters &= Q(author=author)
+
+        if daily_fee_min is not None:
+            self.filters &= Q(daily_fee__gte=daily_fee_min)
+
+        if daily_fee_max is not None:
+            self.filters &= Q(daily_fee__lte=daily_fee_max)
+
+        if cover:
+            self.facet_filters["cover"] = Q(cover=cover)
+
+        if available is not None:
+            self.facet_filters["available"] = (
+                Q(inventory__gt=0) if available else Q(inventory=0)
+            )
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(self.filters, *self.facet_filters.values())
+
+    def exclude_facet(self, name):
+        facet_filters = Q()
+
+        for facet, facet_filter in self.facet_filters.items():
+            if facet != name:
+                facet_filters &= facet_filter
+
+        return facet_filters
+
+    def count_facets(self, queryset):
+        """Count all the facet values with a single aggregate query"""
+        cover_filter = self.exclude_facet("cover")
+        available_filter = self.exclude_facet("available")
+        aggregates = {
+            f"cover_{cover}": Count("id", filter=cover_filter & Q(cover=cover))
+            for cover in Book.CoverType.values
+        }
+        aggregates["available"] = Count(
+            "id",
+            filter=available_filter & Q(inventory__gt=0),
+        )
+        aggregates["unavailable"] = Count(
+            "id",
+            filter=available_filter & Q(inventory=0),
+        )
+
+        counts = queryset.filter(self.filters).aggregate(**aggregates)
+
+        return {
+            "cover": {
+                cover: counts[f"cover_{cover}"]
+                for cover in Book.CoverType.values
+            },
+            "available": {
+                "true": counts["available"],
+                "false": counts["unavailable"],
+            },
+        }
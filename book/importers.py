@@ -0,0 +1,95 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.db import transaction
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+from book.serializers import BookSerializer
+
+IMPORT_FORMATS = {
+    "csv": (".csv",),
+    "ndjson": (".ndjson", ".jsonl"),
+}
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def guess_import_format(filename):
+    _, extension = os.path.splitext(filename or "")
+
+    for import_format, extensions in IMPORT_FORMATS.items():
+        if extension.lower() in extensions:
+            return import_format
+
+    return None
+
+
+def read_csv_rows(stream):
+    for number, row in enumerate(csv.DictReader(stream), start=1):
+        yield number, row, None
+
+
+def read_ndjson_rows(stream):
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, None, {"non_field_errors": [str(error)]}
+            continue
+
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, {"non_field_errors": ["Expected an object."]}
+
+
+ROW_READERS = {
+    "csv": read_csv_rows,
+    "ndjson": read_ndjson_rows,
+}
+
+
+def import_books(stream, import_format, batch_size=IMPORT_BATCH_SIZE):
+    """Validate and insert the books from a text stream batch by batch.
+
+    The stream is read lazily, so the memory use does not depend on the
+    file size. Invalid rows are reported with their numbers and skipped,
+    the valid rows of every batch are inserted with one ``bulk_create``.
+    """
+    rows = ROW_READERS[import_format](stream)
+    report = {"total": 0, "created": 0, "failed": 0, "errors": []}
+
+    while batch := list(islice(rows, batch_size)):
+        books = []
+
+        for number, row, errors in batch:
+            if errors is None:
+                serializer = BookSerializer(data=row)
+
+                if serializer.is_valid():
+                    books.append(Book(**serializer.validated_data))
+                else:
+                    errors = serializer.errors
+
+            if errors is not None:
+                report["failed"] += 1
+
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"row": number, "errors": errors})
+
+        with transaction.atomic():
+            Book.objects.bulk_create(books)
+
+        report["total"] += len(batch)
+        report["created"] += len(books)
+
+    if report["created"]:
+        invalidate_book_cache()
+
+    return report
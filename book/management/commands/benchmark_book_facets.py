@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from book.benchmark import measure, seed_catalog
+from book.filters import BookFilter
+from book.models import Book
+
+PAGE_SIZE = 10
+FILTERS = (
+    {},
+    {"cover": "HARD"},
+    {"available": "true", "daily_fee_max": "5"},
+    {"author": "Maria Novak", "cover": "SOFT", "available": "true"},
+    {"daily_fee_min": "10", "daily_fee_max": "12.5"},
+)
+
+
+def filtered_page(params):
+    """Evaluate the filtered page and its facets like the list endpoint."""
+    book_filter = BookFilter(params)
+    queryset = book_filter.filter_queryset(Book.objects.all())
+    queryset.count()
+    list(queryset[:PAGE_SIZE])
+    book_filter.count_facets(Book.objects.all())
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Measure the faceted book filtering on synthetic catalogs "
+        "of growing sizes. All the data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100000, 300000, 1000000],
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        seeded = 0
+
+        for size in sorted(options["sizes"]):
+            self.stdout.write(f"Seeding up to {size} books...")
+            seed_catalog(size - seeded, seed=seeded)
+            seeded = size
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Book._meta.db_table}")
+
+            for params in FILTERS:
+                timing = measure(
+                    lambda params=params: filtered_page(params),
+                    repeat=options["repeat"],
+                )
+                self.stdout.write(f"{size:>10}{timing:>12.2f} ms  {params}")
+
+        transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("The benchmark is finished!"))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from book.benchmark import measure, seed_catalog
+from book.models import Book
+from book.search import search_books
+
+PAGE_SIZE = 10
+
+
+def first_page(queryset):
+    """Evaluate the queryset the way the paginated list endpoint does."""
+    queryset.count()
+    list(queryset[:PAGE_SIZE])
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare the indexed book search with icontains scans "
+        "on a synthetic catalog. All the data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=1000000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--terms",
+            nargs="+",
+            default=["shadow river", "kowalski", "forgoten", "mirror 42"],
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['size']} books...")
+        seed_catalog(options["size"])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Book._meta.db_table}")
+
+        books = Book.objects.all()
+        self.stdout.write(
+            f"{'term':<20}{'search, ms':>12}{'icontains, ms':>16}"
+        )
+
+        for term in options["terms"]:
+            search_time = measure(
+                lambda term=term: first_page(
+                    search_books(books, term)
+                ),
+                repeat=options["repeat"],
+            )
+            icontains_time = measure(
+                lambda term=term: first_page(
+                    books.filter(
+                        Q(title__icontains=term) | Q(author__icontains=term)
+                    )
+                ),
+                repeat=options["repeat"],
+            )
+            self.stdout.write(
+                f"{term:<20}{search_time:>12.2f}{icontains_time:>16.2f}"
+            )
+
+        transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("The benchmark is finished!"))
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from book.importers import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    guess_import_format,
+    import_books,
+)
+
+
+class Command(BaseCommand):
+    help = "Import the books from a CSV or NDJSON file."  # noqa: VNE003
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=list(IMPORT_FORMATS))
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        import_format = options["format"] or guess_import_format(
+            options["path"]
+        )
+
+        if import_format is None:
+            raise CommandError(
+                "Cannot guess the file format, please pass --format."
+            )
+
+        with open(
+            options["path"],
+            encoding="utf-8-sig",
+            newline="",
+        ) as stream:
+            report = import_books(
+                stream,
+                import_format,
+                batch_size=options["batch_size"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(
+                f"Row {error['row']}: {json.dumps(error['errors'])}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} of {report['total']} books, "
+                f"{report['failed']} rows failed."
+            )
+        )
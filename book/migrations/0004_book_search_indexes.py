@@ -0,0 +1,43 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:21
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("book", "0003_book_image"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "title", "author", config="english"
+                ),
+                name="book_search_vector_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    "title", name="gin_trgm_ops"
+                ),
+                name="book_title_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    "author", name="gin_trgm_ops"
+                ),
+                name="book_author_trgm_idx",
+            ),
+        ),
+    ]
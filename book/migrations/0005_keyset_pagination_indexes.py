@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("book", "0004_book_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["title", "id"], name="book_title_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("book", "0005_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
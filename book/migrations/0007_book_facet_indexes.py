@@ -0,0 +1,36 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("book", "0006_book_image_renditions"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["cover", "daily_fee"],
+                include=("inventory",),
+                name="book_cover_fee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["author", "daily_fee"],
+                include=("cover", "inventory"),
+                name="book_author_fee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                condition=models.Q(("inventory__gt", 0)),
+                fields=["cover", "daily_fee"],
+                name="book_available_cover_fee_idx",
+            ),
+        ),
+    ]
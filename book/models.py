@@ -1,10 +1,13 @@
 import os
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
+from book.search import book_search_vector
+
 
 def create_custom_image_file_path(instance, filename):
     _, extension = os.path.splitext(filename)
@@ -35,9 +38,56 @@ class Book(models.Model):
         blank=True,
         upload_to=create_custom_image_file_path,
     )
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         ordering = ["title"]
+        indexes = [
+            GinIndex(
+                book_search_vector(),
+                name="book_search_vector_idx",
+            ),
+            GinIndex(
+                OpClass("title", name="gin_trgm_ops"),
+                name="book_title_trgm_idx",
+            ),
+            GinIndex(
+                OpClass("author", name="gin_trgm_ops"),
+                name="book_author_trgm_idx",
+            ),
+            models.Index(
+                fields=["title", "id"],
+                name="book_title_id_idx",
+            ),
+            models.Index(
+                fields=["cover", "daily_fee"],
+                include=["inventory"],
+                name="book_cover_fee_idx",
+            ),
+            models.Index(
+                fields=["author", "daily_fee"],
+                include=["cover", "inventory"],
+                name="book_author_fee_idx",
+            ),
+            models.Index(
+                fields=["cover", "daily_fee"],
+                condition=models.Q(inventory__gt=0),
+                name="book_available_cover_fee_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def get_image_rendition(self, name):
+        """Return the path of the image rendition if it is built"""
+        source = self.image_renditions.get("source")
+
+        if self.image and source == self.image.name:
+            return self.image_renditions.get(name)
+
+        return None
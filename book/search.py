@@ -0,0 +1,69 @@
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = "english"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+
+def book_search_vector():
+    """Return the expression indexed by ``book_search_vector_idx``.
+
+    The query has to use exactly the same expression as the index,
+    otherwise Postgres falls back to a sequential scan.
+    """
+    return SearchVector("title", "author", config=SEARCH_CONFIG)
+
+
+def search_books(queryset, term, highlight=False):
+    """Filter the books by ``term`` and order them by relevance.
+
+    A book matches when the full-text vector of its title and author
+    matches the query or when the title or author is trigram-similar
+    to the term, so typos and partial words still find the book.
+    """
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type="websearch")
+    vector = book_search_vector()
+
+    queryset = (
+        queryset.alias(search=vector)
+        .filter(
+            Q(search=query)
+            | Q(title__trigram_similar=term)
+            | Q(author__trigram_similar=term)
+        )
+        .annotate(
+            rank=SearchRank(vector, query)
+            + Greatest(
+                TrigramSimilarity("title", term),
+                TrigramSimilarity("author", term),
+            )
+        )
+        .order_by("-rank", "title", "id")
+    )
+
+    if highlight:
+        queryset = queryset.annotate(
+            title_headline=search_headline("title", query),
+            author_headline=search_headline("author", query),
+        )
+
+    return queryset
+
+
+def search_headline(field, query):
+    return SearchHeadline(
+        field,
+        query,
+        config=SEARCH_CONFIG,
+        start_sel=HIGHLIGHT_START,
+        stop_sel=HIGHLIGHT_STOP,
+        highlight_all=True,
+    )
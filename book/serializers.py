@@ -1,6 +1,29 @@
+import codecs
+
+from django.core.files.storage import default_storage
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from book.models import Book
+from book.tasks import RENDITION_FORMATS, RENDITION_SIZES
+from library_service.fields import SparseFieldsSerializerMixin
+
+IMAGE_RENDITIONS = [
+    f"{size_name}{suffix}"
+    for size_name in RENDITION_SIZES
+    for suffix in RENDITION_FORMATS
+]
+
+
+def build_file_url(serializer, path):
+    url = default_storage.url(path)
+    request = serializer.context.get("request")
+
+    if request is not None:
+        return request.build_absolute_uri(url)
+
+    return url
 
 
 class BookSerializer(serializers.ModelSerializer):
@@ -16,7 +39,13 @@ class BookSerializer(serializers.ModelSerializer):
         )
 
 
-class BookListSerializer(serializers.ModelSerializer):
+class BookListSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer,
+):
+    field_sources = {"image": ("image", "image_renditions")}
+    image = serializers.SerializerMethodField()
+
     class Meta:
         model = Book
         fields = (
@@ -28,8 +57,37 @@ class BookListSerializer(serializers.ModelSerializer):
             "image",
         )
 
+    @extend_schema_field(OpenApiTypes.URI)
+    def get_image(self, book):
+        """Return the thumbnail, or the original until it is built"""
+        if not book.image:
+            return None
+
+        path = book.get_image_rendition("thumbnail") or book.image.name
+        return build_file_url(self, path)
+
+
+class BookSearchSerializer(BookListSerializer):
+    rank = serializers.FloatField(read_only=True)
+    title_headline = serializers.CharField(read_only=True)
+    author_headline = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Book
+        fields = BookListSerializer.Meta.fields + (
+            "rank",
+            "title_headline",
+            "author_headline",
+        )
+
+
+class BookDetailSerializer(
+    SparseFieldsSerializerMixin,
+    serializers.ModelSerializer,
+):
+    field_sources = {"image_renditions": ("image", "image_renditions")}
+    image_renditions = serializers.SerializerMethodField()
 
-class BookDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = (
@@ -40,10 +98,57 @@ class BookDetailSerializer(serializers.ModelSerializer):
             "inventory",
             "daily_fee",
             "image",
+            "image_renditions",
         )
 
+    @extend_schema_field(
+        {
+            "type": "object",
+            "properties": {
+                name: {"type": "string", "format": "uri"}
+                for name in IMAGE_RENDITIONS
+            },
+        }
+    )
+    def get_image_renditions(self, book):
+        renditions = {}
+
+        for name in IMAGE_RENDITIONS:
+            path = book.get_image_rendition(name)
+
+            if path:
+                renditions[name] = build_file_url(self, path)
+
+        return renditions
+
 
 class BookImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ("id", "image")
+
+
+class BookImportSerializer(serializers.Serializer):
+    import_file = serializers.FileField()
+    file_format = serializers.ChoiceField(
+        choices=["csv", "ndjson"],
+        required=False,
+        help_text="Guessed by the file extension when it is omitted.",
+    )
+
+    def validate_import_file(self, value):
+        """Check the encoding before any row is imported"""
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        try:
+            for chunk in value.chunks():
+                decoder.decode(chunk)
+
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise serializers.ValidationError(
+                "The file is not UTF-8 encoded."
+            ) from None
+
+        value.seek(0)
+        return value
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_cached_book(sender, instance, **kwargs):
+    invalidate_book_cache(instance.pk)
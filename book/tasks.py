@@ -0,0 +1,79 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+
+RENDITION_SIZES = {
+    "thumbnail": (200, 300),
+    "medium": (600, 900),
+}
+RENDITION_FORMATS = {
+    "": ("JPEG", ".jpg", {"quality": 85, "optimize": True}),
+    "_webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+}
+
+
+def create_rendition_file_path(image_name, rendition, extension):
+    stem, _ = os.path.splitext(os.path.basename(image_name))
+    filename = f"{stem}-{rendition}{extension}"
+
+    return os.path.join("uploads", "books", "renditions", filename)
+
+
+def save_rendition(image, image_name, rendition, image_format):
+    image_format, extension, options = image_format
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+
+    return default_storage.save(
+        create_rendition_file_path(image_name, rendition, extension),
+        ContentFile(buffer.getvalue()),
+    )
+
+
+def delete_renditions(renditions):
+    for name, path in renditions.items():
+        if name != "source":
+            default_storage.delete(path)
+
+
+def build_image_renditions(book_id):
+    """Build the resized JPEG and WebP renditions of the book image"""
+    book = Book.objects.filter(pk=book_id).first()
+
+    if book is None or not book.image:
+        return
+
+    with book.image.open("rb") as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original).convert("RGB")
+
+    renditions = {"source": book.image.name}
+
+    for size_name, size in RENDITION_SIZES.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+
+        for suffix, image_format in RENDITION_FORMATS.items():
+            rendition = f"{size_name}{suffix}"
+            renditions[rendition] = save_rendition(
+                image,
+                book.image.name,
+                rendition,
+                image_format,
+            )
+
+    updated = Book.objects.filter(pk=book_id, image=book.image.name).update(
+        image_renditions=renditions,
+    )
+
+    if updated:
+        delete_renditions(book.image_renditions)
+        invalidate_book_cache(book_id)
+    else:
+        # The image was replaced while the renditions were being built.
+        delete_renditions(renditions)
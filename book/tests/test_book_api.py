@@ -1,20 +1,27 @@
 import os.path
 import tempfile
+from io import StringIO
 from decimal import Decimal
 
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
+from book.cache import cached_response, get_cache
 from book.models import Book
 from book.serializers import (
     BookListSerializer,
     BookDetailSerializer,
 )
+from book.tasks import build_image_renditions, delete_renditions
+from library_service.rows import ValuesRowBuilder
 
 BOOK_URL = reverse("book:book-list")
 
@@ -36,6 +43,10 @@ def detail_url(book_id):
     return reverse("book:book-detail", args=[book_id])
 
 
+def import_url():
+    return reverse("book:book-bulk-import")
+
+
 def image_upload_url(book_id):
     return reverse("book:book-upload-image", args=[book_id])
 
@@ -158,6 +169,14 @@ class AdminBookApiTests(TestCase):
         self.assertEquals(res.status_code, status.HTTP_200_OK)
         self.assertEquals(payload["title"], book.title)
 
+    def test_export_books(self):
+        res = self.client.get(reverse("book:book-export"))
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(lines[0], "id,title,author,cover,inventory,daily_fee")
+        self.assertEquals(lines[1], f"{self.book.id},Test Title,Test Author,HARD,10,5.99")
+
     def test_delete_book(self):
         url = detail_url(self.book.id)
         res = self.client.delete(url)
@@ -178,6 +197,8 @@ class BookImageUploadTests(TestCase):
         self.book = sample_book()
 
     def tearDown(self) -> None:
+        self.book.refresh_from_db()
+        delete_renditions(self.book.image_renditions)
         self.book.image.delete()
 
     def test_upload_image_to_book(self):
@@ -193,8 +214,474 @@ class BookImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.book.image.path))
 
+    def test_build_image_renditions(self):
+        url = image_upload_url(self.book.id)
+        with tempfile.NamedTemporaryFile(suffix=".png") as ntf:
+            img = Image.new("RGBA", (1000, 1500))
+            img.save(ntf, format="PNG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+
+        build_image_renditions(self.book.id)
+        self.book.refresh_from_db()
+
+        thumbnail_path = self.book.image_renditions["thumbnail_webp"]
+        with default_storage.open(thumbnail_path) as file:
+            with Image.open(file) as thumbnail:
+                self.assertEquals(thumbnail.format, "WEBP")
+                self.assertEquals(thumbnail.size, (200, 300))
+
+        res = self.client.get(detail_url(self.book.id))
+        self.assertEquals(
+            set(res.data["image_renditions"]),
+            {"thumbnail", "thumbnail_webp", "medium", "medium_webp"},
+        )
+
+        res = self.client.get(BOOK_URL)
+        self.assertIn("-thumbnail", res.data["results"][0]["image"])
+
     def test_upload_image_bad_request(self):
         url = image_upload_url(self.book.id)
         res = self.client.post(url, {"image": "not image"}, format="multipart")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookSearchApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.hobbit = sample_book(title="The Hobbit", author="J. R. R. Tolkien")
+        self.dune = sample_book(title="Dune", author="Frank Herbert")
+
+    def test_search_by_title(self):
+        res = self.client.get(BOOK_URL, {"search": "hobbit"})
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            [book["id"] for book in res.data["results"]],
+            [self.hobbit.id],
+        )
+
+    def test_search_by_author(self):
+        res = self.client.get(BOOK_URL, {"search": "herbert"})
+
+        self.assertEquals(
+            [book["id"] for book in res.data["results"]],
+            [self.dune.id],
+        )
+
+    def test_search_tolerates_typos(self):
+        res = self.client.get(BOOK_URL, {"search": "hobit"})
+
+        self.assertEquals(
+            [book["id"] for book in res.data["results"]],
+            [self.hobbit.id],
+        )
+
+    def test_search_highlight(self):
+        res = self.client.get(BOOK_URL, {"search": "hobbit", "highlight": "true"})
+
+        self.assertIn("<mark>Hobbit</mark>", res.data["results"][0]["title_headline"])
+        self.assertIn("rank", res.data["results"][0])
+
+    def test_search_results_without_highlight(self):
+        res = self.client.get(BOOK_URL, {"search": "hobbit"})
+
+        self.assertNotIn("title_headline", res.data["results"][0])
+
+
+class BookCursorPaginationTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+        for i in range(7):
+            sample_book(title=f"Title {i % 3}")
+
+    def test_cursor_pagination_walks_all_books(self):
+        ids = []
+        url = BOOK_URL + "?pagination=cursor&page_size=3"
+
+        while url:
+            res = self.client.get(url)
+            self.assertEquals(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids.extend(book["id"] for book in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEquals(
+            ids,
+            list(Book.objects.order_by("title", "id").values_list("id", flat=True)),
+        )
+
+    def test_cursor_pagination_previous_page(self):
+        first = self.client.get(BOOK_URL, {"pagination": "cursor", "page_size": 3})
+        second = self.client.get(first.data["next"])
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEquals(previous.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_cursor_pagination_invalid_cursor(self):
+        res = self.client.get(BOOK_URL, {"pagination": "cursor", "cursor": "bad"})
+
+        self.assertEquals(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_pagination_with_search(self):
+        res = self.client.get(
+            BOOK_URL, {"pagination": "cursor", "search": "title"}
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pagination", res.data)
+
+
+class BookSparseFieldsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.book = sample_book()
+
+    def test_list_selected_fields(self):
+        res = self.client.get(BOOK_URL, {"fields": "id,title,image"})
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            res.data["results"],
+            [{"id": self.book.id, "title": self.book.title, "image": None}],
+        )
+
+    def test_retrieve_selected_fields(self):
+        res = self.client.get(
+            detail_url(self.book.id), {"fields": "id,inventory"}
+        )
+
+        self.assertEquals(
+            res.data, {"id": self.book.id, "inventory": self.book.inventory}
+        )
+
+    def test_unknown_fields(self):
+        res = self.client.get(BOOK_URL, {"fields": "id,isbn"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expand_is_not_supported(self):
+        res = self.client.get(detail_url(self.book.id), {"expand": "author"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookValuesListTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+        for i in range(12):
+            sample_book(title=f"Title {i}", daily_fee=f"{i}.5")
+
+        sample_book(
+            title="Illustrated",
+            image="uploads/books/illustrated.jpg",
+            image_renditions={
+                "source": "uploads/books/illustrated.jpg",
+                "thumbnail": "uploads/books/illustrated-thumbnail.jpg",
+            },
+        )
+
+    def test_rows_match_serializer(self):
+        request = APIRequestFactory().get(BOOK_URL)
+        serializer = BookListSerializer(context={"request": request})
+        queryset = Book.objects.all()
+        row_builder = ValuesRowBuilder.compile(serializer, queryset)
+
+        self.assertIsNotNone(row_builder)
+        self.assertEquals(
+            row_builder.build(queryset.values(*row_builder.lookups)),
+            BookListSerializer(
+                queryset, many=True, context={"request": request}
+            ).data,
+        )
+
+    def test_list_matches_serializer(self):
+        res = self.client.get(BOOK_URL, {"page_size": 100})
+        serializer = BookListSerializer(
+            Book.objects.all(),
+            many=True,
+            context={"request": res.wsgi_request},
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.json()["results"], serializer.data)
+
+    def test_cursor_pagination_walks_all_books(self):
+        ids = []
+        url = BOOK_URL + "?pagination=cursor&page_size=5&fields=id"
+
+        while url:
+            res = self.client.get(url)
+            ids.extend(book["id"] for book in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEquals(
+            ids,
+            list(
+                Book.objects.order_by("title", "id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+
+@override_settings(BOOK_CACHE_ALIAS="default")
+class BookCacheTests(TestCase):
+    def setUp(self) -> None:
+        get_cache().clear()
+        self.client = APIClient()
+        self.book = sample_book()
+
+    def test_list_books_is_cached(self):
+        self.client.get(BOOK_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(BOOK_URL)
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.data["results"][0]["id"], self.book.id)
+
+    def test_retrieve_book_is_cached(self):
+        self.client.get(detail_url(self.book.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(detail_url(self.book.id))
+
+        self.assertEquals(res.data["id"], self.book.id)
+
+    def test_retrieve_book_pk_is_normalized(self):
+        self.client.get(detail_url(self.book.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(detail_url(f"0{self.book.id}"))
+
+        self.assertEquals(res.data["id"], self.book.id)
+
+        self.book.inventory = 3
+        self.book.save()
+
+        res = self.client.get(detail_url(f"0{self.book.id}"))
+        self.assertEquals(res.data["inventory"], 3)
+
+    def test_retrieve_book_invalid_pk(self):
+        for pk in ("abc", 2**63):
+            res = self.client.get(detail_url(pk))
+
+            self.assertEquals(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_is_invalidated_on_book_update(self):
+        self.client.get(BOOK_URL)
+        self.client.get(detail_url(self.book.id))
+
+        self.book.inventory = 3
+        self.book.save()
+
+        res = self.client.get(BOOK_URL)
+        self.assertEquals(res.data["results"][0]["inventory"], 3)
+
+        res = self.client.get(detail_url(self.book.id))
+        self.assertEquals(res.data["inventory"], 3)
+
+    def test_cache_is_invalidated_on_book_delete(self):
+        self.client.get(BOOK_URL)
+
+        self.book.delete()
+
+        res = self.client.get(BOOK_URL)
+        self.assertEquals(res.data["results"], [])
+
+    def test_stale_entry_is_served_while_rebuilding(self):
+        key = f"book:test:{self.book.id}"
+        get_cache().set(key, ({"stale": True}, 0), None)
+        get_cache().add(f"{key}:lock", True)
+
+        res = cached_response(key, lambda: self.fail("must not rebuild"))
+
+        self.assertEquals(res.data, {"stale": True})
+
+
+class BookImportTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "test_pass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_import_csv(self):
+        content = (
+            "title,author,cover,inventory,daily_fee\n"
+            "Dune,Frank Herbert,HARD,3,1.50\n"
+            "Broken,,SOFT,-1,1.00\n"
+            "Emma,Jane Austen,SOFT,2,0.99\n"
+        )
+        file = SimpleUploadedFile("books.csv", content.encode())
+
+        res = self.client.post(
+            import_url(), {"import_file": file}, format="multipart"
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.data["total"], 3)
+        self.assertEquals(res.data["created"], 2)
+        self.assertEquals(res.data["failed"], 1)
+        self.assertEquals(res.data["errors"][0]["row"], 2)
+        self.assertIn("author", res.data["errors"][0]["errors"])
+        self.assertEquals(
+            set(Book.objects.values_list("title", flat=True)),
+            {"Dune", "Emma"},
+        )
+
+    def test_import_ndjson(self):
+        content = (
+            '{"title": "Dune", "author": "Frank Herbert", "cover": "HARD", '
+            '"inventory": 3, "daily_fee": "1.50"}\n'
+            "not json\n"
+        )
+        file = SimpleUploadedFile("books.ndjson", content.encode())
+
+        res = self.client.post(
+            import_url(), {"import_file": file}, format="multipart"
+        )
+
+        self.assertEquals(res.data["created"], 1)
+        self.assertEquals(res.data["errors"][0]["row"], 2)
+
+    def test_import_not_utf8(self):
+        content = (
+            "title,author,cover,inventory,daily_fee\n"
+            "Dune,Frank Herbert,HARD,3,1.50\n"
+            "Brøken,Author,SOFT,1,1.00\n"
+        )
+        file = SimpleUploadedFile("books.csv", content.encode("latin-1"))
+
+        res = self.client.post(
+            import_url(), {"import_file": file}, format="multipart"
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("import_file", res.data)
+        self.assertFalse(Book.objects.exists())
+
+    def test_import_unknown_format(self):
+        file = SimpleUploadedFile("books.txt", b"title")
+
+        res = self.client.post(
+            import_url(), {"import_file": file}, format="multipart"
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_forbidden(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test_pass")
+        )
+        file = SimpleUploadedFile("books.csv", b"title")
+
+        res = self.client.post(
+            import_url(), {"import_file": file}, format="multipart"
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as ntf:
+            ntf.write(
+                "title,author,cover,inventory,daily_fee\n"
+                "Dune,Frank Herbert,HARD,3,1.50\n"
+            )
+            ntf.flush()
+            out = StringIO()
+            call_command("import_books", ntf.name, stdout=out)
+
+        self.assertIn("Imported 1 of 1 books", out.getvalue())
+        self.assertTrue(Book.objects.filter(title="Dune").exists())
+
+
+class BookFacetApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        sample_book(title="Dune", author="Frank Herbert", daily_fee="1.00")
+        sample_book(
+            title="Emma",
+            author="Jane Austen",
+            cover="SOFT",
+            daily_fee="2.00",
+        )
+        sample_book(
+            title="Persuasion",
+            author="Jane Austen",
+            cover="SOFT",
+            inventory=0,
+            daily_fee="3.00",
+        )
+
+    def test_filter_books(self):
+        res = self.client.get(
+            BOOK_URL,
+            {"author": "Jane Austen", "available": "true"},
+        )
+
+        self.assertEquals(
+            [book["title"] for book in res.data["results"]],
+            ["Emma"],
+        )
+
+    def test_filter_books_by_daily_fee_range(self):
+        res = self.client.get(
+            BOOK_URL,
+            {"daily_fee_min": "1.50", "daily_fee_max": "3"},
+        )
+
+        self.assertEquals(
+            [book["title"] for book in res.data["results"]],
+            ["Emma", "Persuasion"],
+        )
+
+    def test_facet_counts(self):
+        with self.assertNumQueries(3):
+            res = self.client.get(BOOK_URL, {"cover": "SOFT", "facets": "true"})
+
+        self.assertEquals(res.data["count"], 2)
+        self.assertEquals(
+            res.data["facets"],
+            {
+                "cover": {"HARD": 1, "SOFT": 2},
+                "available": {"true": 1, "false": 1},
+            },
+        )
+
+    def test_invalid_daily_fee(self):
+        res = self.client.get(BOOK_URL, {"daily_fee_min": "cheap"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_finite_daily_fee(self):
+        for value in ("NaN", "Infinity", "1e999999999"):
+            res = self.client.get(BOOK_URL, {"daily_fee_min": value})
+
+            self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("daily_fee_min", res.data)
+
+    def test_daily_fee_out_of_range(self):
+        for value in ("10000", "1.001"):
+            res = self.client.get(BOOK_URL, {"daily_fee_max": value})
+
+            self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_cover(self):
+        res = self.client.get(BOOK_URL, {"cover": "PAPER"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("cover", res.data)
+
+    def test_cover_is_case_insensitive(self):
+        res = self.client.get(BOOK_URL, {"cover": "soft"})
+
+        self.assertEquals(res.data["count"], 2)
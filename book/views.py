@@ -1,10 +1,19 @@
-from drf_spectacular.utils import extend_schema
+import io
+
+from django_q.tasks import async_task
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 
+from book.cache import cached_response, detail_cache_key, list_cache_key
+from book.filters import BookFilter
+from book.importers import guess_import_format, import_books
 from book.models import Book
 from book.permissions import IsAdminOrReadOnly
 from book.serializers import (
@@ -12,6 +21,32 @@ from book.serializers import (
     BookListSerializer,
     BookDetailSerializer,
     BookImageSerializer,
+    BookImportSerializer,
+    BookSearchSerializer,
+)
+from book.search import search_books
+from book.tasks import build_image_renditions
+from library_service.export import export_response, get_export_format
+from library_service.fields import FIELDS_PARAMETER, SparseFieldsMixin
+from library_service.ids import parse_id
+from library_service.pagination import (
+    CursorPaginationMixin,
+    KeysetPagination,
+)
+from library_service.rows import ValuesListMixin
+
+
+CURSOR_SEARCH_MESSAGE = (
+    "The search results are ordered by relevance and cannot be paginated "
+    "with a cursor, use the page pagination."
+)
+BOOK_EXPORT_FIELDS = (
+    "id",
+    "title",
+    "author",
+    "cover",
+    "inventory",
+    "daily_fee",
 )
 
 
@@ -21,15 +56,66 @@ class BookPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class BookCursorPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("title", "id")
+
+
 @extend_schema(tags=["Books"])
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    SparseFieldsMixin,
+    ValuesListMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = (IsAdminOrReadOnly,)
     pagination_class = BookPagination
+    cursor_pagination_class = BookCursorPagination
+
+    def get_search_queryset(self):
+        queryset = self.queryset
+        search = self.request.query_params.get("search")
+        highlight = self.request.query_params.get("highlight", "")
+
+        if search:
+            queryset = search_books(
+                queryset,
+                search,
+                highlight=highlight.lower() == "true",
+            )
+
+        return queryset
+
+    def get_queryset(self):
+        queryset = self.queryset
+
+        if self.action == "list":
+            book_filter = BookFilter(self.request.query_params)
+            queryset = book_filter.filter_queryset(self.get_search_queryset())
+
+        return self.get_sparse_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        facets = self.request.query_params.get("facets", "")
+
+        if facets.lower() == "true":
+            book_filter = BookFilter(self.request.query_params)
+            response.data["facets"] = book_filter.count_facets(
+                self.get_search_queryset()
+            )
+
+        return response
 
     def get_serializer_class(self):
         if self.action == "list":
+            if self.request.query_params.get("search"):
+                return BookSearchSerializer
+
             return BookListSerializer
 
         if self.action == "retrieve":
@@ -38,6 +124,9 @@ class BookViewSet(viewsets.ModelViewSet):
         if self.action == "upload_image":
             return BookImageSerializer
 
+        if self.action == "bulk_import":
+            return BookImportSerializer
+
         return BookSerializer
 
     @action(
@@ -53,4 +142,167 @@ class BookViewSet(viewsets.ModelViewSet):
 
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        async_task(build_image_renditions, instance.id)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="import",
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request):
+        """Endpoint for importing the books from a CSV or NDJSON file"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        import_file = serializer.validated_data["import_file"]
+        import_format = serializer.validated_data.get(
+            "file_format"
+        ) or guess_import_format(import_file.name)
+
+        if import_format is None:
+            raise ValidationError(
+                {"file_format": "Cannot guess the file format by its name."}
+            )
+
+        with io.TextIOWrapper(
+            import_file.file,
+            encoding="utf-8-sig",
+            newline="",
+        ) as stream:
+            report = import_books(stream, import_format)
+
+        return Response(report, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="file_format",
+                type=str,
+                enum=["csv", "ndjson"],
+                description="The file format, csv by default "
+                            "(ex. ?file_format=ndjson)",
+                required=False,
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Endpoint for exporting all the books as a CSV or NDJSON file"""
+        return export_response(
+            Book.objects.order_by("id"),
+            BOOK_EXPORT_FIELDS,
+            get_export_format(request),
+            "books",
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="cover",
+                type=str,
+                enum=Book.CoverType.values,
+                description="Filter by cover type (ex. ?cover=HARD)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="author",
+                type=str,
+                description="Filter by author (ex. ?author=Frank Herbert)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="daily_fee_min",
+                type=float,
+                description="Filter by minimal daily fee "
+                            "(ex. ?daily_fee_min=0.5)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="daily_fee_max",
+                type=float,
+                description="Filter by maximal daily fee "
+                            "(ex. ?daily_fee_max=2.5)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="available",
+                type=bool,
+                description="Filter by availability (ex. ?available=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="facets",
+                type=bool,
+                description="Add the number of books of every cover type "
+                            "and availability (ex. ?facets=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="search",
+                type=str,
+                description="Search by title and author, the results are "
+                            "ordered by relevance (ex. ?search=tolkien)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="highlight",
+                type=bool,
+                description="Mark the matching text in the search results "
+                            "(ex. ?search=tolkien&highlight=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="pagination",
+                type=str,
+                enum=["page", "cursor"],
+                description="Use the keyset pagination, which follows "
+                            "the next/previous links and does not count "
+                            "the books, not with ?search= "
+                            "(ex. ?pagination=cursor)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                description="The pagination cursor value "
+                            "(used with ?pagination=cursor)",
+                required=False,
+            ),
+            FIELDS_PARAMETER,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        if (
+            request.query_params.get("search")
+            and request.query_params.get("pagination") == "cursor"
+        ):
+            raise ValidationError({"pagination": [CURSOR_SEARCH_MESSAGE]})
+
+        return cached_response(
+            list_cache_key(request),
+            lambda: super(BookViewSet, self).list(request, *args, **kwargs),
+        )
+
+    @extend_schema(parameters=[FIELDS_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        # "01" and "1" must share the cache key and its version.
+        pk = parse_id(kwargs["pk"])
+
+        if pk is None:
+            raise NotFound
+
+        return cached_response(
+            detail_cache_key(request, pk),
+            lambda: super(BookViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+        )
@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.db.models import (
+    DateField,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Func,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from book.models import Book
+from borrowing.models import Borrowing
+
+OVERDUE_FEE_MULTIPLIER = 2
+
+
+class DaysBetween(Func):
+    """The number of days from the second date to the first one"""
+
+    arg_joiner = " - "
+    template = "(%(expressions)s)"
+    output_field = IntegerField()
+
+
+def fee_updates(end_date, is_final=False):
+    """Build the UPDATE expressions of the borrowing fees on ``end_date``.
+
+    The daily fee is charged for every day up to the expected return date
+    and the overdue days are charged ``OVERDUE_FEE_MULTIPLIER`` times
+    more. The projected fee is what the borrowing costs when it is
+    returned on time or right now, if it is already overdue. Returned
+    borrowings are charged ``is_final`` fees, so both fees are equal.
+    """
+    end_date = Value(end_date, output_field=DateField())
+    daily_fee = Subquery(
+        Book.objects.filter(pk=OuterRef("book_id"))
+        .order_by()
+        .values("daily_fee")[:1]
+    )
+    overdue_days = Greatest(
+        DaysBetween(end_date, F("expected_return_date")),
+        0,
+    )
+    accrued_days = (
+        Greatest(
+            DaysBetween(
+                Least(end_date, F("expected_return_date")),
+                F("borrow_date"),
+            ),
+            0,
+        )
+        + overdue_days * OVERDUE_FEE_MULTIPLIER
+    )
+    projected_days = (
+        accrued_days
+        if is_final
+        else (
+            Greatest(
+                DaysBetween(F("expected_return_date"), F("borrow_date")),
+                0,
+            )
+            + overdue_days * OVERDUE_FEE_MULTIPLIER
+        )
+    )
+    output_field = DecimalField(max_digits=10, decimal_places=2)
+
+    return {
+        "accrued_fee": ExpressionWrapper(
+            daily_fee * accrued_days,
+            output_field=output_field,
+        ),
+        "projected_fee": ExpressionWrapper(
+            daily_fee * projected_days,
+            output_field=output_field,
+        ),
+        "fees_calculated_on": end_date,
+    }
+
+
+def initial_fees(daily_fee, expected_return_date, today=None):
+    """Return the fees of a borrowing made ``today``.
+
+    They are what ``fee_updates`` sets on the borrow date, so a new
+    borrowing shows its fees before the nightly recalculation: nothing is
+    accrued yet and every day up to the expected return date is projected.
+    """
+    today = today or timezone.now().date()
+
+    return {
+        "accrued_fee": Decimal("0.00"),
+        "projected_fee": daily_fee
+        * max((expected_return_date - today).days, 0),
+        "fees_calculated_on": today,
+    }
+
+
+def accrue_borrowing_fees(today=None):
+    """Recalculate the fees of all the active borrowings with one UPDATE.
+
+    Returns the number of the updated borrowings.
+    """
+    today = today or timezone.now().date()
+
+    return Borrowing.objects.filter(is_active=True).update(
+        **fee_updates(today)
+    )
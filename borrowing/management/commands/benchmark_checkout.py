@@ -0,0 +1,115 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from book.models import Book
+from borrowing.models import Borrowing, MonthlyCirculation
+from borrowing.serializers import BorrowingSerializer
+from notification.models import OutboxMessage
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Check out one hot book from many threads at once and report "
+        "the throughput and the oversells. The checkouts run in their "
+        "own committed transactions, so they really contend for the book. "
+        "The created data is deleted and the counters are reverted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--inventory", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        book = Book.objects.create(
+            title=f"Benchmark {run_id}",
+            author="Benchmark",
+            inventory=options["inventory"],
+            daily_fee="1.00",
+        )
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(
+                email=f"benchmark-{run_id}-{i}@example.com",
+                password=make_password(None),
+            )
+            for i in range(options["users"])
+        )
+        expected_return_date = timezone.now().date() + timedelta(days=7)
+
+        def checkout(user):
+            serializer = BorrowingSerializer(
+                data={
+                    "book": book.id,
+                    "expected_return_date": expected_return_date,
+                },
+                context={"request": SimpleNamespace(user=user)},
+            )
+
+            try:
+                with transaction.atomic():
+                    serializer.is_valid(raise_exception=True)
+                    borrowing = serializer.save()
+                    # The drain started on commit finds nothing to send.
+                    OutboxMessage.objects.filter(
+                        key=f"borrowing:{borrowing.id}"
+                    ).delete()
+            except ValidationError:
+                return False
+
+            return True
+
+        try:
+            start = time.perf_counter()
+
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                results = list(executor.map(checkout, users))
+
+            elapsed = time.perf_counter() - start
+
+            book.refresh_from_db()
+            borrowed = Borrowing.objects.filter(book=book).count()
+            oversold = max(borrowed - options["inventory"], 0)
+
+            self.stdout.write(
+                f"{len(users)} attempts in {elapsed:.2f} s "
+                f"({len(users) / elapsed:.0f} checkouts/s), "
+                f"{results.count(True)} succeeded, "
+                f"{borrowed} borrowings, inventory left: {book.inventory}, "
+                f"oversold: {oversold}"
+            )
+        finally:
+            months = (
+                Borrowing.objects.filter(book=book)
+                .annotate(month=TruncMonth("borrow_date"))
+                .values_list("month")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+
+            for month, count in months:
+                MonthlyCirculation.objects.filter(month=month).update(
+                    borrowed=F("borrowed") - count
+                )
+
+            book.delete()
+            get_user_model().objects.filter(
+                email__startswith=f"benchmark-{run_id}-"
+            ).delete()
+
+        if oversold:
+            self.stderr.write(self.style.ERROR("The book was oversold!"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No oversells."))
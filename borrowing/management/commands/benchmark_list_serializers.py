@@ -0,0 +1,124 @@
+from datetime import timedelta
+from itertools import cycle
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from book.benchmark import measure, seed_catalog
+from book.models import Book
+from book.serializers import BookListSerializer
+from borrowing.models import Borrowing
+from borrowing.serializers import BorrowingListSerializer
+from library_service.renderers import ORJSONRenderer
+from library_service.rows import ValuesRowBuilder
+
+SERIALIZERS = (
+    (
+        "books",
+        BookListSerializer,
+        lambda: Book.objects.all(),
+    ),
+    (
+        "borrowings",
+        BorrowingListSerializer,
+        lambda: Borrowing.objects.select_related("book", "user"),
+    ),
+)
+
+
+def serializer_page(serializer_class, queryset, size):
+    """Build and render the page like the DRF list endpoint."""
+    serializer = serializer_class(queryset[:size], many=True)
+    return JSONRenderer().render(serializer.data)
+
+
+def values_page(row_builder, queryset, size):
+    """Build and render the page like the values list endpoint."""
+    rows = queryset.values(*row_builder.lookups)[:size]
+    return ORJSONRenderer().render(row_builder.build(rows))
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Compare the list serializers with the values rows in rows per "
+        "second on pages of growing sizes. All the data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 100, 1000],
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def benchmark(self, name, serializer_class, get_queryset, sizes, repeat):
+        row_builder = ValuesRowBuilder.compile(
+            serializer_class(), get_queryset()
+        )
+
+        for size in sizes:
+            serializer_ms = measure(
+                lambda size=size: serializer_page(
+                    serializer_class, get_queryset(), size
+                ),
+                repeat=repeat,
+            )
+            values_ms = measure(
+                lambda size=size: values_page(
+                    row_builder, get_queryset(), size
+                ),
+                repeat=repeat,
+            )
+            self.stdout.write(
+                f"{name:<12}{size:>6}"
+                f"{size / serializer_ms * 1000:>10.0f} r/s"
+                f"{size / values_ms * 1000:>10.0f} r/s"
+                f"{serializer_ms / values_ms:>9.1f}x"
+            )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        size = max(options["sizes"])
+        self.stdout.write(f"Seeding {size} books and borrowings...")
+        seed_catalog(size, seed=size)
+        user = get_user_model().objects.create(
+            email="benchmark-list-serializers@example.com",
+            password=make_password(None),
+        )
+        expected_return_date = timezone.now().date() + timedelta(days=7)
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=book,
+                user=user,
+                expected_return_date=expected_return_date,
+                is_active=is_active,
+            )
+            for book, is_active in zip(
+                Book.objects.order_by("-id")[:size],
+                cycle((True, False)),
+                strict=False,
+            )
+        )
+
+        self.stdout.write(
+            f"{'list':<12}{'size':>6}{'serializer':>14}{'values':>14}"
+            f"{'speedup':>10}"
+        )
+
+        for name, serializer_class, get_queryset in SERIALIZERS:
+            self.benchmark(
+                name,
+                serializer_class,
+                get_queryset,
+                sorted(options["sizes"]),
+                options["repeat"],
+            )
+
+        transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("The benchmark is finished!"))
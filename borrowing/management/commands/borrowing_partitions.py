@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from borrowing.partitions import (
+    create_returned_partitions,
+    detach_returned_partitions,
+    get_returned_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Create the yearly partitions of the returned borrowings ahead "
+        "and detach the old ones for archiving."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years-ahead", type=int, default=1)
+        parser.add_argument(
+            "--detach-before",
+            type=int,
+            metavar="YEAR",
+            help="Detach the partitions of the years before this one.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The borrowings are partitioned on Postgres.")
+
+        create_returned_partitions(options["years_ahead"])
+
+        if options["detach_before"]:
+            for name in detach_returned_partitions(options["detach_before"]):
+                self.stdout.write(f"Detached {name}.")
+
+        years = ", ".join(str(year) for year in get_returned_partitions())
+        self.stdout.write(
+            self.style.SUCCESS(f"The returned partitions: {years}.")
+        )
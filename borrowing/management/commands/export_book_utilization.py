@@ -0,0 +1,128 @@
+import csv
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from borrowing.models import Borrowing
+from borrowing.utilization import iter_utilization_rows
+
+UTILIZATION_COLUMNS = (
+    "day",
+    "book_id",
+    "title",
+    "loans",
+    "copies",
+    "utilization",
+)
+PARQUET_BATCH_SIZE = 50000
+
+
+def write_csv(rows, path):
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(UTILIZATION_COLUMNS)
+        writer.writerows(rows)
+
+
+def write_parquet(rows, path):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise CommandError(
+            "Install pyarrow to write the Parquet files."
+        ) from error
+
+    schema = pyarrow.schema(
+        [
+            ("day", pyarrow.date32()),
+            ("book_id", pyarrow.int64()),
+            ("title", pyarrow.string()),
+            ("loans", pyarrow.int32()),
+            ("copies", pyarrow.int32()),
+            ("utilization", pyarrow.float64()),
+        ]
+    )
+
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        while batch := list(islice(rows, PARQUET_BATCH_SIZE)):
+            writer.write_table(
+                pyarrow.Table.from_arrays(
+                    [
+                        pyarrow.array(column)
+                        for column in zip(*batch, strict=True)
+                    ],
+                    schema=schema,
+                )
+            )
+
+
+OUTPUT_FORMATS = {
+    "csv": write_csv,
+    "parquet": write_parquet,
+}
+
+
+def get_date_option(options, name):
+    if not options[name]:
+        return None
+
+    date = parse_date(options[name])
+
+    if date is None:
+        raise CommandError(f"Use the YYYY-MM-DD format for --{name}.")
+
+    return date
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Write the daily loans and utilization of every borrowed book "
+        "to a CSV or Parquet file, over the whole history by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=list(OUTPUT_FORMATS))
+        parser.add_argument("--date-from", dest="date_from")
+        parser.add_argument("--date-to", dest="date_to")
+        parser.add_argument("--book-id", type=int, dest="book_id")
+
+    def handle(self, *args, **options):
+        output_format = options["format"] or os.path.splitext(
+            options["path"]
+        )[1].lstrip(".")
+
+        if output_format not in OUTPUT_FORMATS:
+            raise CommandError(
+                "Cannot guess the file format, please pass --format."
+            )
+
+        date_to = get_date_option(options, "date_to") or timezone.now().date()
+        date_from = get_date_option(options, "date_from") or (
+            Borrowing.objects.aggregate(first=Min("borrow_date"))["first"]
+            or date_to
+        )
+
+        if date_from > date_to:
+            raise CommandError("--date-from must not be after --date-to.")
+
+        OUTPUT_FORMATS[output_format](
+            iter_utilization_rows(
+                date_from,
+                date_to,
+                book_ids=[options["book_id"]] if options["book_id"] else None,
+            ),
+            options["path"],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"The utilization from {date_from} to {date_to} "
+                f"is written to {options['path']}."
+            )
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from borrowing.models import (
+    BookCirculation,
+    MonthlyCirculation,
+    ReaderActivity,
+)
+from borrowing.stats import REBUILD_BATCH_SIZE, rebuild_circulation_stats
+
+
+class Command(BaseCommand):
+    help = (  # noqa: VNE003
+        "Recalculate the circulation summary tables from the borrowings. "
+        "Use it to recover the counters after a failure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        rebuild_circulation_stats(batch_size=options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the stats of {BookCirculation.objects.count()} "
+                f"books, {ReaderActivity.objects.count()} readers and "
+                f"{MonthlyCirculation.objects.count()} months."
+            )
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                models.ExpressionWrapper(
+                    models.Q(("is_active", False)),
+                    output_field=models.BooleanField(),
+                ),
+                models.F("expected_return_date"),
+                models.F("id"),
+                name="borrowing_keyset_idx",
+            ),
+        ),
+    ]
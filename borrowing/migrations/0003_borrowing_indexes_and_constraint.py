@@ -0,0 +1,42 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                fields=["-is_active", "expected_return_date"],
+                name="borrowing_ordering_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                fields=["user", "-is_active", "expected_return_date"],
+                name="borrowing_user_ordering_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["expected_return_date"],
+                name="borrowing_active_due_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="borrowing",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_active", True)),
+                fields=("user", "book"),
+                name="unique_active_borrowing",
+            ),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:37
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+
+def mark_overdue_borrowings(apps, schema_editor):
+    Borrowing = apps.get_model("borrowing", "Borrowing")
+    Borrowing.objects.filter(
+        is_active=True,
+        expected_return_date__lt=timezone.now().date(),
+    ).update(
+        is_overdue=True,
+        overdue_since=Cast(
+            models.F("expected_return_date") + timedelta(days=1),
+            output_field=models.DateField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0003_borrowing_indexes_and_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="borrowing",
+            name="is_overdue",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="borrowing",
+            name="overdue_since",
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(
+            mark_overdue_borrowings,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("is_overdue", False)),
+                fields=["expected_return_date"],
+                name="borrowing_pending_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowing",
+            index=models.Index(
+                condition=models.Q(("is_overdue", True)),
+                fields=["user", "expected_return_date"],
+                name="borrowing_overdue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0004_overdue_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="borrowing",
+            name="accrued_fee",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="borrowing",
+            name="fees_calculated_on",
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name="borrowing",
+            name="projected_fee",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=10,
+            ),
+        ),
+    ]
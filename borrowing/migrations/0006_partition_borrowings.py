@@ -0,0 +1,153 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:52
+
+from django.db import migrations
+from django.db.migrations.exceptions import IrreversibleError
+from django.utils import timezone
+
+from borrowing.partitions import (
+    ACTIVE_PARTITION,
+    BORROWING_TABLE,
+    RETURNED_PARTITION,
+    create_returned_partition_sql,
+)
+
+LEGACY_TABLE = f"{BORROWING_TABLE}_legacy"
+SEQUENCE = f"{BORROWING_TABLE}_id_seq"
+
+
+def partition_borrowings(apps, schema_editor):
+    """Rebuild the borrowing table as a partitioned one.
+
+    The rows are copied from the old table in a single statement, so the
+    migration should run in a maintenance window on the large tables.
+    The identity of the id column is replaced with a sequence, because
+    the partitioned tables cannot have identity columns before Postgres
+    17. The primary key includes the partition keys, as Postgres requires.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Borrowing = apps.get_model("borrowing", "Borrowing")
+    columns = ", ".join(
+        schema_editor.quote_name(field.column)
+        for field in Borrowing._meta.local_concrete_fields
+    )
+
+    # The active borrowings land in the partition of their borrow year
+    # when they are returned, so the years of all the rows are covered.
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXTRACT(YEAR FROM MIN(borrow_date))::integer "
+            f"FROM {BORROWING_TABLE}"
+        )
+        first_year = cursor.fetchone()[0]
+
+    current_year = timezone.now().year
+    first_year = min(first_year or current_year, current_year)
+
+    schema_editor.execute(
+        f"ALTER TABLE {BORROWING_TABLE} RENAME TO {LEGACY_TABLE}"
+    )
+    schema_editor.execute(
+        f"CREATE TABLE {BORROWING_TABLE} "
+        f"(LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) "
+        "PARTITION BY LIST (is_active)"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {BORROWING_TABLE} "
+        "ADD PRIMARY KEY (id, is_active, borrow_date)"
+    )
+    schema_editor.execute(
+        f"CREATE TABLE {ACTIVE_PARTITION} "
+        f"PARTITION OF {BORROWING_TABLE} FOR VALUES IN (true)"
+    )
+    schema_editor.execute(
+        f"CREATE TABLE {RETURNED_PARTITION} "
+        f"PARTITION OF {BORROWING_TABLE} FOR VALUES IN (false) "
+        "PARTITION BY RANGE (borrow_date)"
+    )
+
+    for year in range(first_year, current_year + 2):
+        schema_editor.execute(create_returned_partition_sql(year))
+
+    schema_editor.execute(
+        f"CREATE TABLE {RETURNED_PARTITION}_default "
+        f"PARTITION OF {RETURNED_PARTITION} DEFAULT"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {BORROWING_TABLE} ({columns}) "
+        f"SELECT {columns} FROM {LEGACY_TABLE}"
+    )
+    schema_editor.execute(f"DROP TABLE {LEGACY_TABLE}")
+    schema_editor.execute(f"CREATE SEQUENCE {SEQUENCE}")
+    schema_editor.execute(
+        f"ALTER SEQUENCE {SEQUENCE} OWNED BY {BORROWING_TABLE}.id"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {BORROWING_TABLE} "
+        f"ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')"
+    )
+    schema_editor.execute(
+        f"SELECT setval('{SEQUENCE}', COALESCE(MAX(id), 1), "
+        f"MAX(id) IS NOT NULL) FROM {BORROWING_TABLE}"
+    )
+
+    for field_name in ("book", "user"):
+        field = Borrowing._meta.get_field(field_name)
+        schema_editor.execute(
+            schema_editor._create_fk_sql(
+                Borrowing,
+                field,
+                "_fk_%(to_table)s_%(to_column)s",
+            )
+        )
+
+        for sql in schema_editor._field_indexes_sql(Borrowing, field):
+            schema_editor.execute(sql)
+
+    for index in Borrowing._meta.indexes:
+        schema_editor.add_index(Borrowing, index)
+
+    # The unique indexes of the partitioned tables must include all the
+    # partition keys. The constraint only covers the active borrowings,
+    # so it is enforced on the active partition alone.
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX unique_active_borrowing "
+        f"ON {ACTIVE_PARTITION} (user_id, book_id)"
+    )
+
+
+def unpartition_borrowings(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    raise IrreversibleError(
+        "The partitioned borrowing table cannot be turned back into a plain "
+        "one automatically. Restore it from the backup taken before the "
+        "migration, or copy the rows into a new table by hand."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("borrowing", "0005_borrowing_fees"),
+    ]
+
+    # Only the database changes, the state stays as it is. Django cannot
+    # model the composite primary key, so ``id`` stays the primary key of
+    # the state: it is still unique, being drawn from one sequence, and
+    # the ORM only looks rows up by it. The conditional
+    # ``unique_active_borrowing`` constraint is a unique index in Django
+    # too, it is recreated under the same name on the active partition.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    partition_borrowings,
+                    unpartition_borrowings,
+                ),
+            ],
+            state_operations=[],
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("book", "0007_book_facet_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("borrowing", "0006_partition_borrowings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Reservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("WAITING", "Waiting"),
+                            ("HELD", "Held"),
+                            ("FULFILLED", "Fulfilled"),
+                            ("EXPIRED", "Expired"),
+                            ("CANCELLED", "Cancelled"),
+                        ],
+                        default="WAITING",
+                        max_length=9,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("hold_expires_at", models.DateTimeField(null=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to="book.book",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="reservations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at", "id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "WAITING")),
+                        fields=["book", "created_at", "id"],
+                        name="reservation_queue_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "HELD")),
+                        fields=["hold_expires_at"],
+                        name="reservation_hold_expiry_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="reservation",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status__in", ["WAITING", "HELD"])),
+                fields=("user", "book"),
+                name="unique_open_reservation",
+            ),
+        ),
+    ]
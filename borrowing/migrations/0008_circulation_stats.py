@@ -0,0 +1,81 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("book", "0007_book_facet_indexes"),
+        ("borrowing", "0007_reservation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyCirculation",
+            fields=[
+                (
+                    "month",
+                    models.DateField(primary_key=True, serialize=False),
+                ),
+                ("borrowed", models.PositiveIntegerField(default=0)),
+                ("returned", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-month"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ReaderActivity",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="activity",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("borrow_count", models.PositiveIntegerField(default=0)),
+                ("return_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name_plural": "reader activities",
+                "indexes": [
+                    models.Index(
+                        fields=["-borrow_count", "user"],
+                        name="reader_activity_rank_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="BookCirculation",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="circulation",
+                        serialize=False,
+                        to="book.book",
+                    ),
+                ),
+                ("borrow_count", models.PositiveIntegerField(default=0)),
+                ("return_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-borrow_count", "book"],
+                        name="book_circulation_rank_idx",
+                    )
+                ],
+            },
+        ),
+    ]
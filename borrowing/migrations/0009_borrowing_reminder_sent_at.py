@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("borrowing", "0008_circulation_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="borrowing",
+            name="reminder_sent_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
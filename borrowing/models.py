@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils.translation import gettext as _
 
 from book.models import Book
 
@@ -19,12 +20,185 @@ class Borrowing(models.Model):
         related_name="borrowings",
     )
     is_active = models.BooleanField(default=True)
+    is_overdue = models.BooleanField(default=False)
+    overdue_since = models.DateField(null=True)
+    accrued_fee = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+    )
+    projected_fee = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+    )
+    fees_calculated_on = models.DateField(null=True)
+    reminder_sent_at = models.DateTimeField(null=True)
 
     class Meta:
         ordering = ["-is_active", "expected_return_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "book"],
+                condition=models.Q(is_active=True),
+                name="unique_active_borrowing",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["-is_active", "expected_return_date"],
+                name="borrowing_ordering_idx",
+            ),
+            models.Index(
+                fields=["user", "-is_active", "expected_return_date"],
+                name="borrowing_user_ordering_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date"],
+                condition=models.Q(is_active=True),
+                name="borrowing_active_due_idx",
+            ),
+            models.Index(
+                models.ExpressionWrapper(
+                    models.Q(is_active=False),
+                    output_field=models.BooleanField(),
+                ),
+                "expected_return_date",
+                "id",
+                name="borrowing_keyset_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date"],
+                condition=models.Q(is_active=True, is_overdue=False),
+                name="borrowing_pending_due_idx",
+            ),
+            models.Index(
+                fields=["user", "expected_return_date"],
+                condition=models.Q(is_overdue=True),
+                name="borrowing_overdue_idx",
+            ),
+        ]
 
     def __str__(self):
         return (
             f"The book '{self.book.title}' was borrowed by "
             f"{self.user} on {self.borrow_date}."
         )
+
+
+class Reservation(models.Model):
+    class Status(models.TextChoices):
+        WAITING = "WAITING", _("Waiting")
+        HELD = "HELD", _("Held")
+        FULFILLED = "FULFILLED", _("Fulfilled")
+        EXPIRED = "EXPIRED", _("Expired")
+        CANCELLED = "CANCELLED", _("Cancelled")
+
+    book = models.ForeignKey(
+        Book,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+    )
+    status = models.CharField(
+        max_length=9,
+        choices=Status.choices,
+        default=Status.WAITING,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    hold_expires_at = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "book"],
+                condition=models.Q(status__in=["WAITING", "HELD"]),
+                name="unique_open_reservation",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["book", "created_at", "id"],
+                condition=models.Q(status="WAITING"),
+                name="reservation_queue_idx",
+            ),
+            models.Index(
+                fields=["hold_expires_at"],
+                condition=models.Q(status="HELD"),
+                name="reservation_hold_expiry_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"The book '{self.book.title}' was reserved by "
+            f"{self.user} on {self.created_at}."
+        )
+
+
+class BookCirculation(models.Model):
+    book = models.OneToOneField(
+        Book,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="circulation",
+    )
+    borrow_count = models.PositiveIntegerField(default=0)
+    return_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-borrow_count", "book"],
+                name="book_circulation_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"The book '{self.book}' was borrowed "
+            f"{self.borrow_count} times."
+        )
+
+
+class ReaderActivity(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="activity",
+    )
+    borrow_count = models.PositiveIntegerField(default=0)
+    return_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "reader activities"
+        indexes = [
+            models.Index(
+                fields=["-borrow_count", "user"],
+                name="reader_activity_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} borrowed {self.borrow_count} books."
+
+
+class MonthlyCirculation(models.Model):
+    month = models.DateField(primary_key=True)
+    borrowed = models.PositiveIntegerField(default=0)
+    returned = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-month"]
+
+    def __str__(self):
+        return (
+            f"{self.month:%Y-%m}: {self.borrowed} borrowed, "
+            f"{self.returned} returned."
+        )
@@ -0,0 +1,130 @@
+from datetime import date
+
+from django.db import connection, transaction
+
+# The borrowing table is partitioned by is_active. The returned borrowings
+# are partitioned once more by the year of borrow_date, so the old years
+# can be detached and archived.
+BORROWING_TABLE = "borrowing_borrowing"
+ACTIVE_PARTITION = f"{BORROWING_TABLE}_active"
+RETURNED_PARTITION = f"{BORROWING_TABLE}_returned"
+DEFAULT_PARTITION = f"{RETURNED_PARTITION}_default"
+
+
+def returned_partition_name(year):
+    return f"{RETURNED_PARTITION}_{year}"
+
+
+def create_returned_partition_sql(year):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {returned_partition_name(year)} "
+        f"PARTITION OF {RETURNED_PARTITION} "
+        f"FOR VALUES FROM ('{date(year, 1, 1)}') "
+        f"TO ('{date(year + 1, 1, 1)}')"
+    )
+
+
+def get_returned_partitions():
+    """Return the years of the attached returned partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = %s",
+            [RETURNED_PARTITION],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    prefix = f"{RETURNED_PARTITION}_"
+
+    return sorted(
+        int(name.removeprefix(prefix))
+        for name in names
+        if name.removeprefix(prefix).isdigit()
+    )
+
+
+def get_default_partition_years():
+    """Return the years of the rows that have landed in the default"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT EXTRACT(YEAR FROM borrow_date)::integer "
+            f"FROM {DEFAULT_PARTITION} ORDER BY 1"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_returned_partition(year):
+    """Create the partition of the year from the rows it takes over.
+
+    The rows of the year that have already landed in the default
+    partition would make ``CREATE TABLE ... PARTITION OF`` fail, so the
+    partition is built as a standalone table, the rows are moved into it
+    from the default partition and it is attached, all in one
+    transaction.
+    """
+    name = returned_partition_name(year)
+    bounds = [date(year, 1, 1), date(year + 1, 1, 1)]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name} (LIKE {RETURNED_PARTITION} "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE borrow_date >= %s AND borrow_date < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {RETURNED_PARTITION} ATTACH PARTITION {name} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+
+
+def create_returned_partitions(years_ahead=1):
+    """Create the partitions up to ``years_ahead`` years from now.
+
+    The partitions should exist before the rows arrive, otherwise the rows
+    go to the default partition until their partition is created. The
+    years of the rows already in the default partition, like the returns
+    of the borrowings made before the first partition, are created too.
+    Returns the years of the partitions.
+    """
+    current_year = date.today().year
+    years = sorted(
+        set(range(current_year, current_year + years_ahead + 1))
+        | set(get_default_partition_years())
+    )
+    existing = set(get_returned_partitions())
+
+    for year in years:
+        if year not in existing:
+            create_returned_partition(year)
+
+    return years
+
+
+def detach_returned_partitions(before_year):
+    """Detach the returned partitions older than ``before_year``.
+
+    The detached partitions stay as standalone tables, which can be
+    dumped and dropped. Returns the names of the detached tables.
+    """
+    detached = []
+
+    with connection.cursor() as cursor:
+        for year in get_returned_partitions():
+            if year >= before_year:
+                continue
+
+            name = returned_partition_name(year)
+            cursor.execute(
+                f"ALTER TABLE {RETURNED_PARTITION} DETACH PARTITION {name}"
+            )
+            detached.append(name)
+
+    return detached
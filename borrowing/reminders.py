@@ -0,0 +1,128 @@
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from borrowing.models import Borrowing
+from notification.dispatcher import get_dispatcher
+
+REMINDER_BATCH_SIZE = 500
+
+
+def format_reminder(borrowings):
+    lines = [
+        f"'{title}' is due on {due_date:%Y-%m-%d}."
+        for _, _, _, title, due_date in borrowings
+    ]
+    return "\n".join(["Please return the borrowed books in time:", *lines])
+
+
+def claim_due_borrowings(date_from, date_to, batch_size):
+    """Mark a batch of the due borrowings as reminded and return them.
+
+    The rows are claimed with ``SKIP LOCKED`` and committed before any
+    reminder is sent, so the parallel or the retried jobs never pick the
+    same borrowing again.
+    """
+    with transaction.atomic():
+        borrowings = list(
+            Borrowing.objects.select_for_update(
+                skip_locked=True, of=("self",)
+            )
+            .filter(
+                is_active=True,
+                is_overdue=False,
+                expected_return_date__range=(date_from, date_to),
+                reminder_sent_at__isnull=True,
+                user__telegram_chat_id__isnull=False,
+            )
+            .order_by("user_id", "expected_return_date", "id")
+            .values_list(
+                "id",
+                "user_id",
+                "user__telegram_chat_id",
+                "book__title",
+                "expected_return_date",
+            )[:batch_size]
+        )
+        Borrowing.objects.filter(
+            pk__in=[borrowing[0] for borrowing in borrowings]
+        ).update(reminder_sent_at=timezone.now())
+
+    return borrowings
+
+
+def send_reminders(dispatcher, borrowings, failed_ids):
+    """Send one reminder per borrower concurrently, return the sent ones.
+
+    The ids of the borrowings whose reminders cannot be sent are added to
+    ``failed_ids``.
+    """
+    if not borrowings:
+        return 0
+
+    users = {
+        chat_id: list(user_borrowings)
+        for (_, chat_id), user_borrowings in groupby(
+            borrowings,
+            key=lambda borrowing: borrowing[1:3],
+        )
+    }
+    errors = dispatcher.send_many(
+        (chat_id, format_reminder(user_borrowings))
+        for chat_id, user_borrowings in users.items()
+    )
+    sent = 0
+
+    for chat_id, user_borrowings in users.items():
+        if chat_id in errors:
+            failed_ids.extend(borrowing[0] for borrowing in user_borrowings)
+        else:
+            sent += len(user_borrowings)
+
+    return sent
+
+
+def send_due_reminders(days=None, batch_size=REMINDER_BATCH_SIZE):
+    """Remind the borrowers of the books due in the next ``days`` days.
+
+    The borrowings are selected by the ``borrowing_pending_due_idx``
+    range and grouped into one message per borrower. The batches are cut
+    by rows, so the borrowings of the last borrower of a batch are held
+    back for the next batch, which can hold the rest of them. Every batch
+    is sent to the borrowers concurrently. The reminders that cannot be
+    sent are released at the end, so the next run tries them again. The
+    borrowers without a linked Telegram chat are not reminded.
+    """
+    if days is None:
+        days = settings.BORROWING_REMINDER_DAYS
+
+    today = timezone.now().date()
+    dispatcher = get_dispatcher()
+    sent = 0
+    failed_ids = []
+    held = []
+
+    while borrowings := claim_due_borrowings(
+        today, today + timedelta(days=days), batch_size
+    ):
+        borrowings = held + borrowings
+        last_user_id = borrowings[-1][1]
+        split = next(
+            i
+            for i, borrowing in enumerate(borrowings)
+            if borrowing[1] == last_user_id
+        )
+        sent += send_reminders(dispatcher, borrowings[:split], failed_ids)
+        held = borrowings[split:]
+
+    sent += send_reminders(dispatcher, held, failed_ids)
+
+    if failed_ids:
+        Borrowing.objects.filter(pk__in=failed_ids).update(
+            reminder_sent_at=None
+        )
+
+    return sent
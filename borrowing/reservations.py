@@ -0,0 +1,175 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, When
+from django.utils import timezone
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+from borrowing.models import Reservation
+from notification.outbox import enqueue_notification
+
+RESERVATION_BATCH_SIZE = 500
+OPEN_STATUSES = (Reservation.Status.WAITING, Reservation.Status.HELD)
+
+
+def get_hold_expiry():
+    return timezone.now() + timedelta(hours=settings.RESERVATION_HOLD_HOURS)
+
+
+def hold_book_copies(book_id, count):
+    """Hold up to ``count`` copies of the book for the head of its queue.
+
+    The head reservations are locked with SKIP LOCKED, so concurrent
+    returns of the book hold their copies for different patrons.
+    Returns the number of the held copies.
+    """
+    reservations = list(
+        Reservation.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(book_id=book_id, status=Reservation.Status.WAITING)
+        .order_by("created_at", "id")
+        .values_list("id", "user__email", "book__title")[:count]
+    )
+
+    if not reservations:
+        return 0
+
+    hold_expires_at = get_hold_expiry()
+    Reservation.objects.filter(
+        pk__in=[reservation[0] for reservation in reservations]
+    ).update(
+        status=Reservation.Status.HELD,
+        hold_expires_at=hold_expires_at,
+    )
+
+    for reservation_id, email, title in reservations:
+        message = (
+            f"The book '{title}' is held for {email} "
+            f"until {hold_expires_at:%Y-%m-%d %H:%M}."
+        )
+        enqueue_notification(
+            message,
+            key=f"reservation:{reservation_id}",
+            urgent=True,
+        )
+
+    return len(reservations)
+
+
+def release_book_copies(copies):
+    """Give the copies back, holding them for the waiting patrons first.
+
+    ``copies`` maps the book ids to the numbers of the copies. The books
+    are locked, so a new reservation cannot join the queue while its book
+    copy goes to the inventory. The copies nobody waits for are put back
+    to the inventory with one UPDATE.
+    """
+    copies = Counter(copies)
+    books = (
+        Book.objects.select_for_update()
+        .filter(pk__in=copies)
+        .annotate(
+            has_queue=Exists(
+                Reservation.objects.filter(
+                    book=OuterRef("pk"),
+                    status=Reservation.Status.WAITING,
+                )
+            )
+        )
+        .order_by("id")
+        .values_list("id", "has_queue")
+    )
+
+    for book_id, has_queue in books:
+        if has_queue:
+            copies[book_id] -= hold_book_copies(book_id, copies[book_id])
+
+    inventory = +copies
+
+    if inventory:
+        Book.objects.filter(pk__in=inventory).update(
+            inventory=F("inventory")
+            + Case(
+                *(
+                    When(pk=book_id, then=count)
+                    for book_id, count in inventory.items()
+                ),
+                default=0,
+            )
+        )
+
+    invalidate_book_cache(*copies)
+
+
+def claim_held_copy(user, book_id):
+    """Fulfill the hold of the user, so the held copy is borrowed"""
+    return bool(
+        Reservation.objects.filter(
+            user=user,
+            book_id=book_id,
+            status=Reservation.Status.HELD,
+            hold_expires_at__gt=timezone.now(),
+        ).update(status=Reservation.Status.FULFILLED)
+    )
+
+
+@transaction.atomic
+def cancel_reservation(reservation):
+    """Cancel the open reservation and release its copy if it is held.
+
+    Returns False when the reservation is not open anymore.
+    """
+    status = (
+        Reservation.objects.select_for_update()
+        .filter(pk=reservation.pk, status__in=OPEN_STATUSES)
+        .values_list("status", flat=True)
+        .first()
+    )
+
+    if status is None:
+        return False
+
+    Reservation.objects.filter(pk=reservation.pk).update(
+        status=Reservation.Status.CANCELLED,
+    )
+
+    if status == Reservation.Status.HELD:
+        release_book_copies({reservation.book_id: 1})
+
+    return True
+
+
+def reclaim_expired_holds(batch_size=RESERVATION_BATCH_SIZE):
+    """Expire the holds which were not picked up in time.
+
+    The holds are processed in batches, each locked with SKIP LOCKED and
+    committed separately, so the job never blocks the returns for long.
+    The copies go to the next patrons in the queues or back to the
+    inventory. Returns the number of the expired holds.
+    """
+    expired = 0
+
+    while True:
+        with transaction.atomic():
+            holds = list(
+                Reservation.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=Reservation.Status.HELD,
+                    hold_expires_at__lte=timezone.now(),
+                )
+                .order_by("hold_expires_at")
+                .values_list("id", "book_id")[:batch_size]
+            )
+
+            if holds:
+                Reservation.objects.filter(
+                    pk__in=[pk for pk, _ in holds]
+                ).update(status=Reservation.Status.EXPIRED)
+                release_book_copies(Counter(book_id for _, book_id in holds))
+
+        expired += len(holds)
+
+        if len(holds) < batch_size:
+            return expired
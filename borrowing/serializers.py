@@ -1,12 +1,32 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
-from django_q.tasks import async_task
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from book.serializers import BookDetailSerializer
-from borrowing.models import Borrowing
-from notification.services import send_notification
+from book.models import Book
+from book.serializers import BookDetailSerializer, BookListSerializer
+from borrowing.fees import initial_fees
+from borrowing.models import (
+    BookCirculation,
+    Borrowing,
+    MonthlyCirculation,
+    ReaderActivity,
+    Reservation,
+)
+from borrowing.reservations import claim_held_copy
+from borrowing.services import (
+    ALREADY_BORROWED_MESSAGE,
+    ALREADY_RESERVED_MESSAGE,
+    BOOK_AVAILABLE_MESSAGE,
+    BOOK_UNAVAILABLE_MESSAGE,
+    take_book_copies,
+    take_book_copy,
+)
+from borrowing.stats import record_borrowings
+from library_service.fields import SparseFieldsSerializerMixin
+from library_service.ids import MAX_ID
+from notification.outbox import enqueue_notification
 from user.serializers import UserSerializer
 
 
@@ -21,11 +41,13 @@ class BorrowingSerializer(serializers.ModelSerializer):
         )
 
     def validate_book(self, value):
-        if value.inventory == 0:
-            raise ValidationError(
-                "Unfortunately, this book is unavailable "
-                "for borrowing right now."
-            )
+        user = self.context["request"].user
+
+        if value.inventory == 0 and not value.reservations.filter(
+            user=user,
+            status=Reservation.Status.HELD,
+        ).exists():
+            raise ValidationError(BOOK_UNAVAILABLE_MESSAGE)
         return value
 
     def validate_expected_return_date(self, value):
@@ -42,27 +64,148 @@ class BorrowingSerializer(serializers.ModelSerializer):
         user = request.user
         book = validated_data.get("book")
 
-        if user.borrowings.filter(
-            book=book,
-            is_active=True,
-        ).exists():
-            raise ValidationError(
-                "Sorry, but you have already borrowed this book!"
-            )
+        if not (
+            claim_held_copy(user, book.id) or take_book_copy(book.id)
+        ):
+            raise ValidationError({"book": [BOOK_UNAVAILABLE_MESSAGE]})
 
-        book.inventory -= 1
-        book.save()
-
-        borrowing = Borrowing.objects.create(
-            user=user,
-            **validated_data,
-        )
+        try:
+            with transaction.atomic():
+                borrowing = Borrowing.objects.create(
+                    user=user,
+                    **validated_data,
+                    **initial_fees(
+                        book.daily_fee,
+                        validated_data["expected_return_date"],
+                    ),
+                )
+        except IntegrityError:
+            # The unique_active_borrowing constraint is violated.
+            raise ValidationError(ALREADY_BORROWED_MESSAGE) from None
+        record_borrowings([(user.id, book.id)])
         message = f"{user} borrowed the book '{book.title}'."
-        async_task(send_notification, message)
+        enqueue_notification(message, key=f"borrowing:{borrowing.id}")
         return borrowing
 
 
-class BorrowingListSerializer(BorrowingSerializer):
+class BorrowingCheckoutSerializer(BorrowingSerializer):
+    books = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        min_length=1,
+        max_length=10,
+        write_only=True,
+    )
+
+    class Meta:
+        model = Borrowing
+        fields = (
+            "books",
+            "expected_return_date",
+        )
+
+    def validate_books(self, value):
+        if len(set(value)) != len(value):
+            raise ValidationError("The books must not repeat.")
+        return value
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Borrow all the books at once or none of them.
+
+        The books are locked, checked for availability and for active
+        borrowings of the user with a single query.
+        """
+        request = self.context.get("request")
+        user = request.user
+        book_ids = validated_data["books"]
+
+        books = list(
+            Book.objects.select_for_update()
+            .filter(pk__in=book_ids)
+            .annotate(
+                is_borrowed=Exists(
+                    Borrowing.objects.filter(
+                        book=OuterRef("pk"),
+                        user=user,
+                        is_active=True,
+                    )
+                ),
+                is_held=Exists(
+                    Reservation.objects.filter(
+                        book=OuterRef("pk"),
+                        user=user,
+                        status=Reservation.Status.HELD,
+                        hold_expires_at__gt=timezone.now(),
+                    )
+                ),
+            )
+            .order_by("id")
+            .only("id", "title", "inventory", "daily_fee")
+        )
+        found_ids = {book.id for book in books}
+        errors = {
+            book_id: "Invalid pk - object does not exist."
+            for book_id in book_ids
+            if book_id not in found_ids
+        }
+
+        for book in books:
+            if book.is_borrowed:
+                errors[book.id] = ALREADY_BORROWED_MESSAGE
+            elif book.inventory == 0 and not book.is_held:
+                errors[book.id] = BOOK_UNAVAILABLE_MESSAGE
+
+        if errors:
+            raise ValidationError({"books": errors})
+
+        held_ids = [book.id for book in books if book.is_held]
+
+        if held_ids:
+            Reservation.objects.filter(
+                user=user,
+                book_id__in=held_ids,
+                status=Reservation.Status.HELD,
+            ).update(status=Reservation.Status.FULFILLED)
+
+        if len(held_ids) < len(books):
+            take_book_copies(
+                [book.id for book in books if not book.is_held]
+            )
+
+        try:
+            with transaction.atomic():
+                expected_return_date = validated_data[
+                    "expected_return_date"
+                ]
+                borrowings = Borrowing.objects.bulk_create(
+                    Borrowing(
+                        user=user,
+                        book=book,
+                        expected_return_date=expected_return_date,
+                        **initial_fees(book.daily_fee, expected_return_date),
+                    )
+                    for book in books
+                )
+        except IntegrityError:
+            # A concurrent request has borrowed one of the books.
+            raise ValidationError(
+                {"books": [ALREADY_BORROWED_MESSAGE]}
+            ) from None
+        record_borrowings((user.id, book.id) for book in books)
+        titles = ", ".join(f"'{book.title}'" for book in books)
+        message = f"{user} borrowed the books {titles}."
+        enqueue_notification(message, key=f"borrowing:{borrowings[0].id}")
+        return borrowings
+
+
+class BorrowingListSerializer(
+    SparseFieldsSerializerMixin,
+    BorrowingSerializer,
+):
+    expandable_fields = {
+        "book": BookListSerializer,
+        "user": UserSerializer,
+    }
     book = serializers.CharField(
         source="book.title",
         read_only=True,
@@ -82,10 +225,21 @@ class BorrowingListSerializer(BorrowingSerializer):
             "book",
             "user",
             "is_active",
+            "is_overdue",
+            "overdue_since",
+            "accrued_fee",
+            "projected_fee",
         )
 
 
-class BorrowingDetailSerializer(BorrowingSerializer):
+class BorrowingDetailSerializer(
+    SparseFieldsSerializerMixin,
+    BorrowingSerializer,
+):
+    expandable_fields = {
+        "book": BookDetailSerializer,
+        "user": UserSerializer,
+    }
     book = BookDetailSerializer(read_only=True)
     user = UserSerializer(read_only=True)
 
@@ -99,6 +253,10 @@ class BorrowingDetailSerializer(BorrowingSerializer):
             "book",
             "user",
             "is_active",
+            "is_overdue",
+            "overdue_since",
+            "accrued_fee",
+            "projected_fee",
         )
 
 
@@ -117,3 +275,122 @@ class BorrowingReturnSerializer(BorrowingSerializer):
             "expected_return_date",
             "book",
         )
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        min_length=1,
+        max_length=100,
+    )
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Reservation
+        fields = (
+            "id",
+            "book",
+            "status",
+            "created_at",
+            "hold_expires_at",
+        )
+        read_only_fields = (
+            "id",
+            "status",
+            "created_at",
+            "hold_expires_at",
+        )
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Put the user to the end of the book queue.
+
+        The book is locked, so a returned copy cannot go to the inventory
+        while the reservation joins the queue.
+        """
+        request = self.context.get("request")
+        user = request.user
+        book = Book.objects.select_for_update().get(
+            pk=validated_data["book"].pk
+        )
+
+        if book.inventory > 0:
+            raise ValidationError({"book": [BOOK_AVAILABLE_MESSAGE]})
+
+        if Borrowing.objects.filter(
+            user=user,
+            book=book,
+            is_active=True,
+        ).exists():
+            raise ValidationError(ALREADY_BORROWED_MESSAGE)
+
+        try:
+            with transaction.atomic():
+                return Reservation.objects.create(
+                    user=user,
+                    **validated_data,
+                )
+        except IntegrityError:
+            # The unique_open_reservation constraint is violated.
+            raise ValidationError(ALREADY_RESERVED_MESSAGE) from None
+
+
+class ReservationListSerializer(ReservationSerializer):
+    book = serializers.CharField(
+        source="book.title",
+        read_only=True,
+    )
+    user = serializers.CharField(
+        source="user.email",
+        read_only=True,
+    )
+
+    class Meta:
+        model = Reservation
+        fields = (
+            "id",
+            "book",
+            "user",
+            "status",
+            "created_at",
+            "hold_expires_at",
+        )
+
+
+class BookCirculationSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="book.title", read_only=True)
+    author = serializers.CharField(source="book.author", read_only=True)
+
+    class Meta:
+        model = BookCirculation
+        fields = (
+            "book_id",
+            "title",
+            "author",
+            "borrow_count",
+            "return_count",
+        )
+
+
+class ReaderActivitySerializer(serializers.ModelSerializer):
+    email = serializers.CharField(source="user.email", read_only=True)
+
+    class Meta:
+        model = ReaderActivity
+        fields = (
+            "user_id",
+            "email",
+            "borrow_count",
+            "return_count",
+        )
+
+
+class MonthlyCirculationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MonthlyCirculation
+        fields = (
+            "month",
+            "borrowed",
+            "returned",
+        )
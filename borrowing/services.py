@@ -0,0 +1,166 @@
+from collections import Counter
+from datetime import timedelta
+from functools import wraps
+
+from django.db import OperationalError, transaction
+from django.db.models import DateField, F
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+from borrowing.fees import fee_updates
+from borrowing.models import Borrowing
+from borrowing.reservations import release_book_copies
+from borrowing.stats import record_returns
+
+BOOK_UNAVAILABLE_MESSAGE = (
+    "Unfortunately, this book is unavailable for borrowing right now."
+)
+ALREADY_BORROWED_MESSAGE = "Sorry, but you have already borrowed this book!"
+BOOK_AVAILABLE_MESSAGE = "The book is available, you can borrow it right now."
+ALREADY_RESERVED_MESSAGE = "Sorry, but you have already reserved this book!"
+SERIALIZATION_FAILURE = "40001"
+
+
+def take_book_copy(book_id):
+    """Decrement the inventory if there is a copy left.
+
+    The check and the decrement are one conditional UPDATE, so concurrent
+    checkouts of the last copy cannot both succeed.
+    """
+    updated = Book.objects.filter(pk=book_id, inventory__gt=0).update(
+        inventory=F("inventory") - 1,
+    )
+
+    if updated:
+        invalidate_book_cache(book_id)
+
+    return bool(updated)
+
+
+def take_book_copies(book_ids):
+    """Decrement the inventory of every book with one UPDATE"""
+    Book.objects.filter(pk__in=book_ids).update(inventory=F("inventory") - 1)
+    invalidate_book_cache(*book_ids)
+
+
+def retry_on_moved_row(func):
+    """Run the atomic function again if a borrowing has moved partitions.
+
+    Returning a borrowing moves it from the active partition to the
+    returned one, and Postgres fails the concurrent updates and locks of
+    the moved row with a serialization failure. The second run reads the
+    borrowing as already returned.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as error:
+            pgcode = getattr(error.__cause__, "pgcode", None)
+
+            if pgcode != SERIALIZATION_FAILURE:
+                raise
+
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@retry_on_moved_row
+@transaction.atomic
+def close_borrowing(borrowing):
+    """Mark the borrowing as returned and put the book copy back.
+
+    Returns False when the borrowing has already been returned, so
+    concurrent returns of the same borrowing increment the inventory once.
+    """
+    today = timezone.now().date()
+    updated = Borrowing.objects.filter(pk=borrowing.pk, is_active=True).update(
+        is_active=False,
+        is_overdue=False,
+        actual_return_date=today,
+        **fee_updates(today, is_final=True),
+    )
+
+    if updated:
+        release_book_copies({borrowing.book_id: 1})
+        record_returns([(borrowing.user_id, borrowing.book_id)])
+
+    return bool(updated)
+
+
+RETURNED = "returned"
+ALREADY_RETURNED = "already_returned"
+NOT_FOUND = "not_found"
+
+
+@retry_on_moved_row
+@transaction.atomic
+def close_borrowings(user, borrowing_ids):
+    """Return many borrowings of the user with set-based statements.
+
+    The requested borrowings are locked and read with one query and closed
+    with one UPDATE. The copies go to the waiting reservations first and
+    the rest is put back with one more UPDATE. Returns the status of every
+    requested id.
+    """
+    borrowings = list(
+        Borrowing.objects.select_for_update()
+        .filter(pk__in=borrowing_ids, user=user)
+        .values_list("id", "book_id", "is_active")
+    )
+    statuses = dict.fromkeys(borrowing_ids, NOT_FOUND)
+    returned_books = Counter()
+
+    for borrowing_id, book_id, is_active in borrowings:
+        if is_active:
+            statuses[borrowing_id] = RETURNED
+            returned_books[book_id] += 1
+        else:
+            statuses[borrowing_id] = ALREADY_RETURNED
+
+    if returned_books:
+        returned_ids = [
+            pk for pk, status in statuses.items() if status == RETURNED
+        ]
+        today = timezone.now().date()
+        Borrowing.objects.filter(pk__in=returned_ids).update(
+            is_active=False,
+            is_overdue=False,
+            actual_return_date=today,
+            **fee_updates(today, is_final=True),
+        )
+        release_book_copies(returned_books)
+        record_returns(
+            (user.id, book_id)
+            for book_id, count in returned_books.items()
+            for _ in range(count)
+        )
+
+    return statuses
+
+
+def mark_overdue_borrowings(today=None):
+    """Flag the active borrowings whose expected return date has passed.
+
+    Only the borrowings which are not flagged yet are read through the
+    borrowing_pending_due_idx partial index, so a run touches just the
+    borrowings that became overdue since the previous one.
+    Returns the number of the flagged borrowings.
+    """
+    today = today or timezone.now().date()
+
+    return Borrowing.objects.filter(
+        is_active=True,
+        is_overdue=False,
+        expected_return_date__lt=today,
+    ).update(
+        is_overdue=True,
+        overdue_since=Cast(
+            F("expected_return_date") + timedelta(days=1),
+            output_field=DateField(),
+        ),
+    )
@@ -0,0 +1,154 @@
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from borrowing.models import (
+    BookCirculation,
+    Borrowing,
+    MonthlyCirculation,
+    ReaderActivity,
+)
+
+REBUILD_BATCH_SIZE = 5000
+
+
+def increment_counters(model, counters):
+    """Add ``counters`` to the rows of a summary table with one upsert.
+
+    ``counters`` maps the primary keys to the dicts of the increments, the
+    other counters of the rows are not changed. The missing rows are
+    inserted, the existing ones are incremented in place, so concurrent
+    events never lose an update. The rows are upserted in the key order
+    to avoid deadlocks.
+    """
+    if not counters:
+        return
+
+    quote_name = connection.ops.quote_name
+    table = quote_name(model._meta.db_table)
+    fields = [
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    columns = [model._meta.pk.column] + [
+        model._meta.get_field(field).column for field in fields
+    ]
+    row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    updates = ", ".join(
+        f"{quote_name(column)} = {table}.{quote_name(column)} "
+        f"+ EXCLUDED.{quote_name(column)}"
+        for column in columns[1:]
+    )
+    params = []
+
+    for key in sorted(counters):
+        params.append(key)
+        params.extend(counters[key].get(field, 0) for field in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} "
+            f"({', '.join(quote_name(column) for column in columns)}) "
+            f"VALUES {', '.join([row] * len(counters))} "
+            f"ON CONFLICT ({quote_name(columns[0])}) DO UPDATE SET {updates}",
+            params,
+        )
+
+
+def update_circulation(borrowings, counter_field, month_field):
+    month = timezone.now().date().replace(day=1)
+    books = Counter(book_id for _, book_id in borrowings)
+    readers = Counter(user_id for user_id, _ in borrowings)
+
+    increment_counters(
+        BookCirculation,
+        {book_id: {counter_field: count} for book_id, count in books.items()},
+    )
+    increment_counters(
+        ReaderActivity,
+        {
+            user_id: {counter_field: count}
+            for user_id, count in readers.items()
+        },
+    )
+    increment_counters(
+        MonthlyCirculation,
+        {month: {month_field: len(borrowings)}},
+    )
+
+
+def record_borrowings(borrowings):
+    """Count the new borrowings in the summary tables after the commit.
+
+    ``borrowings`` is a list of the ``(user_id, book_id)`` pairs. The
+    counters are updated in their own short statements, so the hot
+    monthly row is never locked for the whole checkout transaction.
+    """
+    borrowings = list(borrowings)
+    transaction.on_commit(
+        lambda: update_circulation(borrowings, "borrow_count", "borrowed")
+    )
+
+
+def record_returns(borrowings):
+    """Count the returned borrowings in the summary tables after commit"""
+    borrowings = list(borrowings)
+    transaction.on_commit(
+        lambda: update_circulation(borrowings, "return_count", "returned")
+    )
+
+
+@transaction.atomic
+def rebuild_circulation_stats(batch_size=REBUILD_BATCH_SIZE):
+    """Recalculate the summary tables from the borrowing table.
+
+    It is the recovery path, the tables are normally kept up to date by
+    the borrow and return events.
+    """
+    BookCirculation.objects.all().delete()
+    ReaderActivity.objects.all().delete()
+    MonthlyCirculation.objects.all().delete()
+
+    for model, field in (
+        (BookCirculation, "book_id"),
+        (ReaderActivity, "user_id"),
+    ):
+        rows = (
+            Borrowing.objects.order_by()
+            .values(field)
+            .annotate(
+                borrow_count=Count("id"),
+                return_count=Count("id", filter=Q(is_active=False)),
+            )
+            .iterator(chunk_size=batch_size)
+        )
+
+        while batch := list(islice(rows, batch_size)):
+            model.objects.bulk_create(model(**row) for row in batch)
+
+    months = defaultdict(Counter)
+
+    for month_field, date_field in (
+        ("borrowed", "borrow_date"),
+        ("returned", "actual_return_date"),
+    ):
+        rows = (
+            Borrowing.objects.filter(**{f"{date_field}__isnull": False})
+            .annotate(month=TruncMonth(date_field))
+            .order_by()
+            .values("month")
+            .annotate(count=Count("id"))
+        )
+
+        for row in rows:
+            months[row["month"]][month_field] = row["count"]
+
+    MonthlyCirculation.objects.bulk_create(
+        MonthlyCirculation(month=month, **counts)
+        for month, counts in months.items()
+    )
@@ -1,16 +1,32 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
 from book.models import Book
 from borrowing.models import Borrowing
+from borrowing.fees import accrue_borrowing_fees
+from borrowing.services import mark_overdue_borrowings
+from borrowing.stats import rebuild_circulation_stats
 from borrowing.serializers import BorrowingListSerializer, BorrowingDetailSerializer
+from library_service.renderers import ORJSONRenderer
+from notification.models import OutboxMessage
 
 BORROWING_URL = reverse("borrowing:borrowing-list")
 PAGINATION_COUNT = 10
@@ -41,6 +57,13 @@ def create_borrowings(user, books):
     ]
 
 
+EXPORT_URL = reverse("borrowing:borrowing-export")
+BULK_RETURN_URL = reverse("borrowing:borrowing-return-borrowings")
+CHECKOUT_URL = reverse("borrowing:borrowing-checkout")
+STATS_URL = reverse("borrowing:borrowing-stats")
+UTILIZATION_URL = reverse("borrowing:borrowing-utilization")
+
+
 def detail_url(borrowing_id):
     return reverse("borrowing:borrowing-detail", args=[borrowing_id])
 
@@ -115,6 +138,52 @@ class AuthenticatedBorrowingApiTests(TestCase):
         self.assertEquals(book, getattr(borrowing, "book"))
         self.assertEquals(book.inventory, 4)
 
+    def test_create_borrowing_calculates_fees(self):
+        today = timezone.now().date()
+        payload = {
+            "expected_return_date": str(today + timedelta(days=3)),
+            "book": self.books[0].id,
+        }
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        borrowing = Borrowing.objects.get(id=res.data["id"])
+        self.assertEquals(borrowing.accrued_fee, Decimal("0.00"))
+        self.assertEquals(borrowing.projected_fee, Decimal("17.97"))
+        self.assertEquals(borrowing.fees_calculated_on, today)
+
+    def test_create_borrowing_writes_outbox(self):
+        book = self.books[0]
+        payload = {
+            "expected_return_date": str(
+                timezone.now().date() + timedelta(days=2)
+            ),
+            "book": book.id,
+        }
+
+        res = self.client.post(BORROWING_URL, payload)
+
+        message = OutboxMessage.objects.get()
+        self.assertEquals(message.key, f"borrowing:{res.data['id']}")
+        self.assertEquals(
+            message.message, f"{self.user} borrowed the book '{book.title}'."
+        )
+
+    def test_create_borrowing_twice(self):
+        self.test_create_borrowing()
+        book = self.books[0]
+
+        payload = {
+            "expected_return_date": str(timezone.now().date() + timedelta(days=2)),
+            "book": book.id,
+        }
+        res = self.client.post(BORROWING_URL, payload)
+        book.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(book.inventory, 4)
+        self.assertEquals(Borrowing.objects.filter(book=book).count(), 1)
+
     def test_update_borrowing_is_not_allowed(self):
         create_borrowings(self.user, self.books)
 
@@ -151,3 +220,697 @@ class AuthenticatedBorrowingApiTests(TestCase):
 
         self.assertEquals(res.status_code, status.HTTP_200_OK)
         self.assertEquals(book.inventory, 5)
+
+    def test_return_borrowing_twice(self):
+        self.test_create_borrowing()
+        book = self.books[0]
+
+        borrowing = Borrowing.objects.all()[0]
+
+        url = return_borrowing_url(borrowing.id)
+        self.client.patch(url)
+        res = self.client.patch(url)
+        book.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(book.inventory, 5)
+
+    def test_return_borrowings(self):
+        borrowings = create_borrowings(self.user, self.books)
+        returned = borrowings[0]
+        returned.is_active = False
+        returned.save()
+        other_user = get_user_model().objects.create_user(
+            "other@test.com",
+            "test_pass",
+        )
+        foreign = Borrowing.objects.create(
+            expected_return_date=timezone.now().date() + timedelta(days=2),
+            book=self.books[1],
+            user=other_user,
+        )
+        ids = [borrowings[1].id, borrowings[2].id, returned.id, foreign.id]
+
+        with self.assertNumQueries(6):
+            res = self.client.post(BULK_RETURN_URL, {"ids": ids}, format="json")
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            res.data["results"],
+            [
+                {"id": borrowings[1].id, "status": "returned"},
+                {"id": borrowings[2].id, "status": "returned"},
+                {"id": returned.id, "status": "already_returned"},
+                {"id": foreign.id, "status": "not_found"},
+            ],
+        )
+        for book in self.books[1:3]:
+            inventory = book.inventory
+            book.refresh_from_db()
+            self.assertEquals(book.inventory, inventory + 1)
+        self.assertFalse(
+            Borrowing.objects.filter(
+                id__in=ids[:2],
+                is_active=True,
+            ).exists()
+        )
+
+    def test_return_borrowings_empty(self):
+        res = self.client.post(BULK_RETURN_URL, {"ids": []}, format="json")
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_return_borrowings_id_over_bigint(self):
+        res = self.client.post(
+            BULK_RETURN_URL, {"ids": [2**63]}, format="json"
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_checkout_books(self):
+        books = self.books[:3]
+        payload = {
+            "books": [book.id for book in books],
+            "expected_return_date": str(timezone.now().date() + timedelta(days=2)),
+        }
+
+        res = self.client.post(CHECKOUT_URL, payload, format="json")
+
+        self.assertEquals(res.status_code, status.HTTP_201_CREATED)
+        self.assertEquals(
+            [borrowing["book"] for borrowing in res.data],
+            [book.id for book in books],
+        )
+        for book in books:
+            inventory = book.inventory
+            book.refresh_from_db()
+            self.assertEquals(book.inventory, inventory - 1)
+
+    def test_checkout_books_id_over_bigint(self):
+        payload = {
+            "books": [self.books[0].id, 2**63],
+            "expected_return_date": str(
+                timezone.now().date() + timedelta(days=2)
+            ),
+        }
+
+        res = self.client.post(CHECKOUT_URL, payload, format="json")
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Borrowing.objects.exists())
+
+    def test_checkout_books_calculates_fees(self):
+        payload = {
+            "books": [self.books[0].id, self.books[1].id],
+            "expected_return_date": str(
+                timezone.now().date() + timedelta(days=2)
+            ),
+        }
+
+        self.client.post(CHECKOUT_URL, payload, format="json")
+
+        self.assertEquals(
+            list(
+                Borrowing.objects.order_by("book_id").values_list(
+                    "projected_fee", flat=True
+                )
+            ),
+            [Decimal("11.98"), Decimal("13.98")],
+        )
+
+    def test_checkout_books_all_or_nothing(self):
+        Borrowing.objects.create(
+            expected_return_date=timezone.now().date() + timedelta(days=2),
+            book=self.books[0],
+            user=self.user,
+        )
+        Book.objects.filter(id=self.books[1].id).update(inventory=0)
+        payload = {
+            "books": [book.id for book in self.books[:3]] + [999999],
+            "expected_return_date": str(timezone.now().date() + timedelta(days=2)),
+        }
+
+        res = self.client.post(CHECKOUT_URL, payload, format="json")
+        self.books[2].refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(
+            set(res.json()["books"]),
+            {str(self.books[0].id), str(self.books[1].id), "999999"},
+        )
+        self.assertEquals(self.books[2].inventory, 7)
+        self.assertEquals(Borrowing.objects.count(), 1)
+
+    def test_create_borrowing_unavailable_book(self):
+        book = self.books[0]
+        Book.objects.filter(id=book.id).update(inventory=0)
+
+        payload = {
+            "expected_return_date": str(timezone.now().date() + timedelta(days=2)),
+            "book": book.id,
+        }
+        res = self.client.post(BORROWING_URL, payload)
+        book.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(book.inventory, 0)
+
+    def test_list_borrowings_cursor_pagination(self):
+        borrowings = create_borrowings(self.user, self.books)
+
+        for borrowing in borrowings[::3]:
+            borrowing.is_active = False
+            borrowing.save()
+
+        ids = []
+        url = BORROWING_URL + "?pagination=cursor&page_size=3"
+
+        while url:
+            res = self.client.get(url)
+            self.assertEquals(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids.extend(borrowing["id"] for borrowing in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEquals(
+            ids,
+            list(
+                Borrowing.objects.order_by(
+                    "-is_active", "expected_return_date", "id"
+                ).values_list("id", flat=True)
+            ),
+        )
+
+    def test_mark_overdue_borrowings(self):
+        borrowings = create_borrowings(self.user, self.books)
+        today = timezone.now().date()
+        Borrowing.objects.filter(id__in=[b.id for b in borrowings[:3]]).update(
+            expected_return_date=today - timedelta(days=2)
+        )
+        Borrowing.objects.filter(id=borrowings[0].id).update(is_active=False)
+
+        self.assertEquals(mark_overdue_borrowings(), 2)
+        self.assertEquals(mark_overdue_borrowings(), 0)
+
+        overdue = Borrowing.objects.get(id=borrowings[1].id)
+        self.assertTrue(overdue.is_overdue)
+        self.assertEquals(overdue.overdue_since, today - timedelta(days=1))
+
+        res = self.client.get(BORROWING_URL, {"is_overdue": "true"})
+
+        self.assertEquals(
+            [borrowing["id"] for borrowing in res.data["results"]],
+            [borrowings[1].id, borrowings[2].id],
+        )
+
+        self.client.patch(return_borrowing_url(borrowings[1].id))
+        overdue.refresh_from_db()
+
+        self.assertFalse(overdue.is_overdue)
+
+    def test_invalid_filter_params(self):
+        for params in (
+            {"is_overdue": "maybe"},
+            {"is_active": "1"},
+            {"user_id": "me"},
+        ):
+            res = self.client.get(BORROWING_URL, params)
+
+            self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), res.data)
+
+    def test_filter_by_bigint_user_id(self):
+        res = self.client.get(BORROWING_URL, {"user_id": 2**31})
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.data["results"], [])
+
+    def test_accrue_borrowing_fees(self):
+        borrowings = create_borrowings(self.user, self.books)
+        today = timezone.now().date()
+        Borrowing.objects.filter(id=borrowings[0].id).update(
+            borrow_date=today - timedelta(days=5),
+            expected_return_date=today - timedelta(days=2),
+        )
+        Borrowing.objects.filter(id=borrowings[1].id).update(
+            borrow_date=today - timedelta(days=1),
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEquals(accrue_borrowing_fees(), NUMBER_OF_BOOKS)
+
+        overdue = Borrowing.objects.get(id=borrowings[0].id)
+        active = Borrowing.objects.get(id=borrowings[1].id)
+
+        self.assertEquals(overdue.accrued_fee, Decimal("41.93"))
+        self.assertEquals(overdue.projected_fee, Decimal("41.93"))
+        self.assertEquals(active.accrued_fee, Decimal("6.99"))
+        self.assertEquals(active.projected_fee, Decimal("20.97"))
+        self.assertEquals(active.fees_calculated_on, today)
+
+        self.client.patch(return_borrowing_url(active.id))
+        active.refresh_from_db()
+
+        self.assertEquals(active.accrued_fee, Decimal("6.99"))
+        self.assertEquals(active.projected_fee, Decimal("6.99"))
+
+
+class BorrowingSparseFieldsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "test_pass",
+        )
+        self.client.force_authenticate(self.user)
+        self.books = create_books()
+        self.borrowings = create_borrowings(self.user, self.books)
+
+    def test_list_selected_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                BORROWING_URL, {"fields": "id,expected_return_date,book"}
+            )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            set(res.data["results"][0]),
+            {"id", "expected_return_date", "book"},
+        )
+        self.assertIn(
+            res.data["results"][0]["book"],
+            [book.id for book in self.books],
+        )
+        self.assertFalse(
+            any("book_book" in query["sql"] for query in queries)
+        )
+        self.assertFalse(
+            any("projected_fee" in query["sql"] for query in queries)
+        )
+
+    def test_list_expand_book(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                BORROWING_URL, {"fields": "id,book", "expand": "book"}
+            )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            res.data["results"][0]["book"]["title"],
+            Borrowing.objects.get(id=res.data["results"][0]["id"]).book.title,
+        )
+
+    def test_list_cursor_pagination_with_fields(self):
+        ids = []
+        url = BORROWING_URL + "?pagination=cursor&page_size=3&fields=id"
+
+        while url:
+            res = self.client.get(url)
+            ids.extend(borrowing["id"] for borrowing in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEquals(
+            sorted(ids),
+            sorted(borrowing.id for borrowing in self.borrowings),
+        )
+
+    def test_retrieve_selected_fields(self):
+        borrowing = self.borrowings[0]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(borrowing.id),
+                {"fields": "id,book,user", "expand": "user"},
+            )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.data["book"], borrowing.book_id)
+        self.assertEquals(res.data["user"]["email"], self.user.email)
+        self.assertEquals(set(res.data), {"id", "book", "user"})
+
+    def test_retrieve_without_params_is_unchanged(self):
+        borrowing = self.borrowings[0]
+
+        res = self.client.get(detail_url(borrowing.id))
+
+        self.assertEquals(
+            res.data, BorrowingDetailSerializer(borrowing).data
+        )
+
+    def test_unknown_fields(self):
+        res = self.client.get(BORROWING_URL, {"fields": "id,password"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_expand(self):
+        res = self.client.get(BORROWING_URL, {"expand": "is_active"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BorrowingValuesListTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "test_pass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.books = create_books()
+        self.borrowings = create_borrowings(self.user, self.books)
+        Borrowing.objects.filter(id=self.borrowings[0].id).update(
+            is_active=False,
+            actual_return_date=timezone.now().date(),
+            accrued_fee=Decimal("12.5"),
+        )
+
+    def test_list_matches_serializer(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(BORROWING_URL, {"page_size": 100})
+
+        serializer = BorrowingListSerializer(
+            Borrowing.objects.order_by("-is_active", "expected_return_date"),
+            many=True,
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        # The borrowings due on the same day come in no particular order.
+        self.assertEquals(
+            sorted(res.json()["results"], key=lambda row: row["id"]),
+            sorted(serializer.data, key=lambda row: row["id"]),
+        )
+
+    def test_rendered_json_matches_drf(self):
+        res = self.client.get(BORROWING_URL, {"page_size": 100})
+
+        self.assertEquals(res.content, JSONRenderer().render(res.data))
+
+    def test_renderer_escapes_like_drf(self):
+        res = self.client.post(
+            CHECKOUT_URL,
+            {
+                "books": [self.books[1].id, 999999],
+                "expected_return_date": str(
+                    timezone.now().date() + timedelta(days=2)
+                ),
+            },
+            format="json",
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(res.content, JSONRenderer().render(res.data))
+
+    def test_renderer_falls_back_for_big_integers(self):
+        data = {"id": 2**64, "title": "Title"}
+
+        self.assertEquals(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+
+class AdminBorrowingStatsTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "test_pass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.books = create_books()
+
+    def checkout(self, books):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                CHECKOUT_URL,
+                {
+                    "books": [book.id for book in books],
+                    "expected_return_date": str(
+                        timezone.now().date() + timedelta(days=2)
+                    ),
+                },
+                format="json",
+            )
+
+    def test_events_update_stats(self):
+        self.checkout(self.books[:3])
+        borrowing = Borrowing.objects.get(book=self.books[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(return_borrowing_url(borrowing.id))
+
+        self.checkout(self.books[1:2])
+
+        res = self.client.get(STATS_URL, {"limit": 2})
+        month = timezone.now().date().replace(day=1)
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(
+            [
+                (book["book_id"], book["borrow_count"], book["return_count"])
+                for book in res.data["most_borrowed_books"]
+            ],
+            [(self.books[1].id, 2, 1), (self.books[0].id, 1, 0)],
+        )
+        self.assertEquals(
+            [
+                (reader["user_id"], reader["borrow_count"])
+                for reader in res.data["most_active_readers"]
+            ],
+            [(self.user.id, 4)],
+        )
+        self.assertEquals(
+            res.data["monthly_circulation"],
+            [{"month": str(month), "borrowed": 4, "returned": 1}],
+        )
+
+        rebuild_circulation_stats()
+
+        rebuilt = self.client.get(STATS_URL, {"limit": 2})
+
+        self.assertEquals(rebuilt.data, res.data)
+
+    def test_stats_invalid_limit(self):
+        res = self.client.get(STATS_URL, {"limit": "many"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_forbidden(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test_pass")
+        )
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEquals(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdminBorrowingUtilizationTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "test_pass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.books = create_books()
+        self.today = timezone.now().date()
+        readers = [
+            get_user_model().objects.create_user(
+                f"reader{i}@test.com",
+                "test_pass",
+            )
+            for i in range(3)
+        ]
+        # The loans of the first book over the last 5 days: 1, 2, 2, 1, 1.
+        for reader, (borrowed, returned) in zip(
+            readers, [(10, 3), (3, None), (3, 1)]
+        ):
+            borrowing = Borrowing.objects.create(
+                expected_return_date=self.today + timedelta(days=2),
+                book=self.books[0],
+                user=reader,
+            )
+            Borrowing.objects.filter(id=borrowing.id).update(
+                borrow_date=self.today - timedelta(days=borrowed),
+                actual_return_date=(
+                    self.today - timedelta(days=returned)
+                    if returned is not None
+                    else None
+                ),
+                is_active=returned is None,
+            )
+
+    def test_utilization(self):
+        res = self.client.get(
+            UTILIZATION_URL,
+            {
+                "date_from": str(self.today - timedelta(days=4)),
+                "date_to": str(self.today),
+            },
+        )
+        book = res.data["books"][0]
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(len(res.data["books"]), 1)
+        self.assertEquals(book["id"], self.books[0].id)
+        self.assertEquals(book["loans"], [1, 2, 2, 1, 1])
+        self.assertEquals(book["copies"], self.books[0].inventory + 1)
+        self.assertEquals(book["peak_loans"], 2)
+        self.assertEquals(
+            book["peak_utilization"],
+            round(2 / (self.books[0].inventory + 1), 4),
+        )
+
+    def test_utilization_invalid_range(self):
+        res = self.client.get(
+            UTILIZATION_URL,
+            {
+                "date_from": str(self.today),
+                "date_to": str(self.today - timedelta(days=1)),
+            },
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_utilization_invalid_book_id(self):
+        for book_id in ("abc", "\u00b2", "0", "99999999999999999999"):
+            res = self.client.get(UTILIZATION_URL, {"book_id": book_id})
+
+            self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("book_id", res.data)
+
+    def test_utilization_of_bigint_book_id(self):
+        res = self.client.get(UTILIZATION_URL, {"book_id": 2**31})
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res.data["books"], [])
+
+    def test_export_utilization_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "utilization.csv")
+            call_command(
+                "export_book_utilization",
+                path,
+                date_from=str(self.today - timedelta(days=4)),
+                stdout=io.StringIO(),
+            )
+
+            with open(path, encoding="utf-8") as stream:
+                rows = list(csv.DictReader(stream))
+
+        self.assertEquals(
+            [int(row["loans"]) for row in rows],
+            [1, 2, 2, 1, 1],
+        )
+
+
+class AdminBorrowingExportTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com",
+            "test_pass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+        self.borrowings = create_borrowings(self.user, create_books())
+
+    def test_export_csv(self):
+        res = self.client.get(EXPORT_URL)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(res["Content-Type"], "text/csv")
+        self.assertTrue(lines[0].startswith("id,borrow_date"))
+        self.assertEquals(len(lines), NUMBER_OF_BOOKS + 1)
+
+    def test_export_ndjson_with_filters(self):
+        returned = self.borrowings[0]
+        returned.is_active = False
+        returned.save()
+
+        res = self.client.get(
+            EXPORT_URL,
+            {
+                "file_format": "ndjson",
+                "is_active": "false",
+                "date_from": str(timezone.now().date()),
+            },
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).splitlines()
+        ]
+
+        self.assertEquals([row["id"] for row in rows], [returned.id])
+        self.assertEquals(rows[0]["user__email"], self.user.email)
+
+    def test_export_invalid_date(self):
+        res = self.client.get(EXPORT_URL, {"date_from": "yesterday"})
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_forbidden(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test_pass")
+        )
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEquals(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    THREADS = 16
+    INVENTORY = 5
+
+    def setUp(self) -> None:
+        self.book = Book.objects.create(
+            title="Hot Title",
+            author="Hot Author",
+            cover="HARD",
+            inventory=self.INVENTORY,
+            daily_fee="1.00",
+        )
+        self.users = [
+            get_user_model().objects.create_user(f"user{i}@test.com", "test_pass")
+            for i in range(self.THREADS * 2)
+        ]
+
+    def checkout(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        try:
+            res = client.post(
+                BORROWING_URL,
+                {
+                    "expected_return_date": str(
+                        timezone.now().date() + timedelta(days=2)
+                    ),
+                    "book": self.book.id,
+                },
+            )
+            return res.status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_checkouts_never_oversell(self):
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            codes = list(executor.map(self.checkout, self.users))
+
+        self.book.refresh_from_db()
+
+        self.assertEquals(codes.count(status.HTTP_201_CREATED), self.INVENTORY)
+        self.assertEquals(
+            codes.count(status.HTTP_400_BAD_REQUEST),
+            len(self.users) - self.INVENTORY,
+        )
+        self.assertEquals(self.book.inventory, 0)
+        self.assertEquals(
+            Borrowing.objects.filter(book=self.book).count(),
+            self.INVENTORY,
+        )
@@ -0,0 +1,162 @@
+from datetime import date, timedelta
+from importlib import import_module
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.exceptions import IrreversibleError
+from django.test import TestCase
+from django.utils import timezone
+
+from book.models import Book
+from borrowing.models import Borrowing
+from borrowing.partitions import (
+    ACTIVE_PARTITION,
+    DEFAULT_PARTITION,
+    RETURNED_PARTITION,
+    create_returned_partitions,
+    get_returned_partitions,
+    returned_partition_name,
+)
+
+NUMBER_OF_BORROWINGS = 50
+
+
+class BorrowingIndexTests(TestCase):
+    """Check that the hot borrowing queries are served by the indexes.
+
+    The sequential scans are disabled for the test transaction, so the
+    planner picks them only when there is no usable index at all.
+    """
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "test_pass",
+        )
+        self.books = Book.objects.bulk_create(
+            Book(
+                title=f"Title {i}",
+                author=f"Author {i}",
+                cover="HARD",
+                inventory=10,
+                daily_fee="5.99",
+            )
+            for i in range(NUMBER_OF_BORROWINGS)
+        )
+        today = timezone.now().date()
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                expected_return_date=today + timedelta(days=i - 25),
+                book=book,
+                user=self.user,
+                is_active=i % 2 == 0,
+            )
+            for i, book in enumerate(self.books)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("ANALYZE borrowing_borrowing")
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+
+        self.assertNotIn("Seq Scan", plan)
+        self.assertIn("Index", plan)
+
+    def test_active_borrowing_check_uses_index(self):
+        self.assertUsesIndex(
+            self.user.borrowings.filter(book=self.books[0], is_active=True)
+        )
+
+    def test_list_ordering_uses_index(self):
+        self.assertUsesIndex(Borrowing.objects.all()[:10])
+
+    def test_user_filter_uses_index(self):
+        self.assertUsesIndex(
+            Borrowing.objects.filter(user=self.user, is_active=True)[:10]
+        )
+
+    def test_overdue_scan_uses_index(self):
+        self.assertUsesIndex(
+            Borrowing.objects.filter(
+                is_active=True,
+                expected_return_date__lt=timezone.now().date(),
+            )
+        )
+
+    def test_active_queries_touch_only_the_active_partition(self):
+        plan = self.user.borrowings.filter(is_active=True).explain()
+
+        self.assertIn(ACTIVE_PARTITION, plan)
+        self.assertNotIn(RETURNED_PARTITION, plan)
+
+
+def count_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+class ReturnedPartitionTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "test_pass",
+        )
+        self.book = Book.objects.create(
+            title="Title",
+            author="Author",
+            cover="HARD",
+            inventory=10,
+            daily_fee="5.99",
+        )
+
+    def create_returned_borrowing(self, borrow_date):
+        borrowing = Borrowing.objects.create(
+            expected_return_date=borrow_date + timedelta(days=14),
+            book=self.book,
+            user=self.user,
+            is_active=False,
+        )
+        Borrowing.objects.filter(pk=borrowing.pk).update(
+            borrow_date=borrow_date
+        )
+        return borrowing
+
+    def test_rows_are_moved_out_of_the_default_partition(self):
+        year = timezone.now().year + 3
+        borrowing = self.create_returned_borrowing(date(year, 6, 1))
+
+        self.assertNotIn(year, get_returned_partitions())
+        self.assertEquals(count_rows(DEFAULT_PARTITION), 1)
+
+        create_returned_partitions(years_ahead=3)
+
+        self.assertIn(year, get_returned_partitions())
+        self.assertEquals(count_rows(DEFAULT_PARTITION), 0)
+        self.assertEquals(count_rows(returned_partition_name(year)), 1)
+        self.assertEquals(
+            Borrowing.objects.get(pk=borrowing.pk).borrow_date,
+            date(year, 6, 1),
+        )
+
+    def test_past_years_of_the_default_partition_are_created(self):
+        self.create_returned_borrowing(date(1999, 6, 1))
+
+        self.assertIn(1999, create_returned_partitions())
+        self.assertIn(1999, get_returned_partitions())
+        self.assertEquals(count_rows(DEFAULT_PARTITION), 0)
+        self.assertEquals(count_rows(returned_partition_name(1999)), 1)
+
+    def test_partitioning_is_irreversible(self):
+        migration = import_module(
+            "borrowing.migrations.0006_partition_borrowings"
+        )
+        schema_editor = SimpleNamespace(
+            connection=SimpleNamespace(vendor="postgresql")
+        )
+
+        with self.assertRaises(IrreversibleError):
+            migration.unpartition_borrowings(None, schema_editor)
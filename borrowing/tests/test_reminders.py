@@ -0,0 +1,126 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from book.models import Book
+from borrowing.models import Borrowing
+from borrowing.reminders import send_due_reminders
+from notification.dispatcher import NotificationError
+
+
+class DueRemindersTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.books = [
+            Book.objects.create(
+                title=f"Title {i}",
+                author=f"Author {i}",
+                cover="HARD",
+                inventory=5,
+                daily_fee="1.99",
+            )
+            for i in range(4)
+        ]
+        self.reader = get_user_model().objects.create_user(
+            "reader@test.com", "test_pass", telegram_chat_id=101
+        )
+        self.other_reader = get_user_model().objects.create_user(
+            "other@test.com", "test_pass", telegram_chat_id=102
+        )
+        self.unlinked_reader = get_user_model().objects.create_user(
+            "unlinked@test.com", "test_pass"
+        )
+        self.dispatcher = mock.Mock()
+        self.dispatcher.send_many.side_effect = self.send_many
+        self.sent = []
+        self.errors = {}
+        patcher = mock.patch(
+            "borrowing.reminders.get_dispatcher",
+            return_value=self.dispatcher,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send_many(self, messages):
+        self.sent.extend(messages)
+        return self.errors
+
+    def sent_to(self, chat_id):
+        return next(
+            message for sent_id, message in self.sent if sent_id == chat_id
+        )
+
+    def create_borrowing(self, user, book, days, **params):
+        return Borrowing.objects.create(
+            user=user,
+            book=book,
+            expected_return_date=self.today + timedelta(days=days),
+            **params,
+        )
+
+    def test_reminders_are_grouped_by_borrower(self):
+        self.create_borrowing(self.reader, self.books[0], days=1)
+        self.create_borrowing(self.reader, self.books[1], days=2)
+        self.create_borrowing(self.reader, self.books[2], days=5)
+        self.create_borrowing(
+            self.reader, self.books[3], days=1, is_active=False
+        )
+        self.create_borrowing(self.other_reader, self.books[0], days=0)
+        self.create_borrowing(self.unlinked_reader, self.books[0], days=1)
+
+        self.assertEquals(send_due_reminders(days=2), 3)
+        self.assertEquals(
+            sorted(self.sent),
+            [
+                (
+                    101,
+                    "Please return the borrowed books in time:\n"
+                    f"'Title 0' is due on {self.today + timedelta(days=1)}.\n"
+                    f"'Title 1' is due on {self.today + timedelta(days=2)}.",
+                ),
+                (
+                    102,
+                    "Please return the borrowed books in time:\n"
+                    f"'Title 0' is due on {self.today}.",
+                ),
+            ],
+        )
+
+    def test_borrower_is_not_split_across_batches(self):
+        for book in self.books[:3]:
+            self.create_borrowing(self.reader, book, days=1)
+
+        self.create_borrowing(self.other_reader, self.books[0], days=1)
+
+        self.assertEquals(send_due_reminders(days=2, batch_size=2), 4)
+        self.assertEquals(
+            sorted(chat_id for chat_id, _ in self.sent), [101, 102]
+        )
+        self.assertEquals(self.sent_to(101).count("is due on"), 3)
+
+    def test_reminder_is_sent_once(self):
+        borrowing = self.create_borrowing(self.reader, self.books[0], days=1)
+
+        self.assertEquals(send_due_reminders(days=2), 1)
+        self.assertEquals(send_due_reminders(days=2), 0)
+
+        borrowing.refresh_from_db()
+        self.assertIsNotNone(borrowing.reminder_sent_at)
+        self.assertEquals(len(self.sent), 1)
+
+    def test_failed_reminder_is_retried(self):
+        borrowing = self.create_borrowing(self.reader, self.books[0], days=1)
+        self.create_borrowing(self.other_reader, self.books[1], days=1)
+        self.errors = {101: NotificationError("Forbidden")}
+
+        self.assertEquals(send_due_reminders(days=2, batch_size=1), 1)
+
+        borrowing.refresh_from_db()
+        self.assertIsNone(borrowing.reminder_sent_at)
+
+        self.errors = {}
+
+        self.assertEquals(send_due_reminders(days=2), 1)
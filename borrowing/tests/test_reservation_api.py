@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from book.models import Book
+from borrowing.models import Borrowing, Reservation
+from borrowing.reservations import reclaim_expired_holds
+
+RESERVATION_URL = reverse("borrowing:reservation-list")
+BORROWING_URL = reverse("borrowing:borrowing-list")
+
+
+def return_borrowing_url(borrowing_id):
+    return reverse("borrowing:borrowing-return-borrowing", args=[borrowing_id])
+
+
+def cancel_reservation_url(reservation_id):
+    return reverse("borrowing:reservation-cancel", args=[reservation_id])
+
+
+class ReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.users = [
+            get_user_model().objects.create_user(
+                f"test{i}@test.com",
+                "test_pass",
+            )
+            for i in range(3)
+        ]
+        self.book = Book.objects.create(
+            title="Title",
+            author="Author",
+            cover="HARD",
+            inventory=0,
+            daily_fee="5.99",
+        )
+        self.borrowing = Borrowing.objects.create(
+            expected_return_date=timezone.now().date() + timedelta(days=2),
+            book=self.book,
+            user=self.users[0],
+        )
+
+    def reserve(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(RESERVATION_URL, {"book": self.book.id})
+
+    def return_book(self):
+        self.client.force_authenticate(self.users[0])
+        return self.client.patch(return_borrowing_url(self.borrowing.id))
+
+    def test_reserve_unavailable_book(self):
+        res = self.reserve(self.users[1])
+
+        self.assertEquals(res.status_code, status.HTTP_201_CREATED)
+        self.assertEquals(res.data["status"], Reservation.Status.WAITING)
+
+    def test_reserve_twice(self):
+        self.reserve(self.users[1])
+        res = self.reserve(self.users[1])
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEquals(Reservation.objects.count(), 1)
+
+    def test_reserve_available_book(self):
+        Book.objects.filter(id=self.book.id).update(inventory=1)
+
+        res = self.reserve(self.users[1])
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_return_holds_copy_for_queue_head(self):
+        first = self.reserve(self.users[1]).data["id"]
+        second = self.reserve(self.users[2]).data["id"]
+
+        self.return_book()
+        self.book.refresh_from_db()
+
+        self.assertEquals(self.book.inventory, 0)
+        self.assertEquals(
+            Reservation.objects.get(id=first).status,
+            Reservation.Status.HELD,
+        )
+        self.assertEquals(
+            Reservation.objects.get(id=second).status,
+            Reservation.Status.WAITING,
+        )
+
+        self.client.force_authenticate(self.users[2])
+        res = self.client.post(
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": self.borrowing.expected_return_date,
+            },
+        )
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.users[1])
+        res = self.client.post(
+            BORROWING_URL,
+            {
+                "book": self.book.id,
+                "expected_return_date": self.borrowing.expected_return_date,
+            },
+        )
+        self.book.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_201_CREATED)
+        self.assertEquals(self.book.inventory, 0)
+        self.assertEquals(
+            Reservation.objects.get(id=first).status,
+            Reservation.Status.FULFILLED,
+        )
+
+    def test_expired_hold_goes_to_next_patron(self):
+        first = self.reserve(self.users[1]).data["id"]
+        second = self.reserve(self.users[2]).data["id"]
+        self.return_book()
+        Reservation.objects.filter(id=first).update(
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEquals(reclaim_expired_holds(batch_size=1), 1)
+        self.assertEquals(
+            Reservation.objects.get(id=first).status,
+            Reservation.Status.EXPIRED,
+        )
+        self.assertEquals(
+            Reservation.objects.get(id=second).status,
+            Reservation.Status.HELD,
+        )
+
+    def test_cancel_held_reservation_returns_copy(self):
+        reservation_id = self.reserve(self.users[1]).data["id"]
+        self.return_book()
+
+        self.client.force_authenticate(self.users[1])
+        res = self.client.patch(cancel_reservation_url(reservation_id))
+        self.book.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertEquals(self.book.inventory, 1)
+
+        res = self.client.patch(cancel_reservation_url(reservation_id))
+
+        self.assertEquals(res.status_code, status.HTTP_400_BAD_REQUEST)
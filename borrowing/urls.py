@@ -1,8 +1,9 @@
 from rest_framework import routers
 
-from borrowing.views import BorrowingViewSet
+from borrowing.views import BorrowingViewSet, ReservationViewSet
 
 router = routers.DefaultRouter()
+router.register("reservations", ReservationViewSet)
 router.register("", BorrowingViewSet)
 
 urlpatterns = router.urls
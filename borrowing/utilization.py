@@ -0,0 +1,186 @@
+import heapq
+from datetime import timedelta
+from itertools import accumulate, groupby
+
+from django.db.models import (
+    Count,
+    DateField,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from book.models import Book
+from borrowing.models import Borrowing, Reservation
+
+MAX_UTILIZATION_DAYS = 366
+
+
+def count_subquery(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values("book_id")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+        output_field=IntegerField(),
+    )
+
+
+def get_book_copies(book_ids=None):
+    """Return the titles and the total numbers of copies of the books.
+
+    The inventory only counts the copies on the shelf, so the copies on
+    loan and on hold are added to it.
+    """
+    books = Book.objects.order_by("id")
+
+    if book_ids is not None:
+        books = books.filter(pk__in=book_ids)
+
+    books = books.annotate(
+        on_loan=count_subquery(
+            Borrowing.objects.filter(book=OuterRef("pk"), is_active=True)
+        ),
+        on_hold=count_subquery(
+            Reservation.objects.filter(
+                book=OuterRef("pk"),
+                status=Reservation.Status.HELD,
+            )
+        ),
+    ).values_list(
+        "id",
+        "title",
+        F("inventory") + F("on_loan") + F("on_hold"),
+    )
+
+    return {book_id: (title, copies) for book_id, title, copies in books}
+
+
+def iter_loan_events(date_from, date_to, book_ids=None):
+    """Yield the ``(book_id, day, delta)`` loan events sorted by book.
+
+    The borrowings are aggregated into the daily numbers of the started
+    and finished loans in SQL. The loans started before the range start
+    on its first day, the loans still open never finish.
+    """
+    borrowings = Borrowing.objects.filter(
+        Q(actual_return_date__isnull=True)
+        | Q(actual_return_date__gt=date_from),
+        borrow_date__lte=date_to,
+    ).order_by()
+
+    if book_ids is not None:
+        borrowings = borrowings.filter(book_id__in=book_ids)
+
+    starts = (
+        borrowings.values(
+            "book_id",
+            day=Greatest(
+                "borrow_date",
+                Value(date_from, output_field=DateField()),
+            ),
+        )
+        .annotate(delta=Count("id"))
+        .order_by("book_id", "day")
+        .values_list("book_id", "day", "delta")
+        .iterator()
+    )
+    ends = (
+        borrowings.filter(actual_return_date__lte=date_to)
+        .values("book_id", day=F("actual_return_date"))
+        .annotate(delta=-Count("id"))
+        .order_by("book_id", "day")
+        .values_list("book_id", "day", "delta")
+        .iterator()
+    )
+
+    return heapq.merge(starts, ends, key=lambda event: event[:2])
+
+
+def iter_book_loans(date_from, date_to, book_ids=None):
+    """Yield ``(book_id, loans)`` with the daily concurrent loan counts.
+
+    Every book is swept once: its loan events are added to a difference
+    array over the days of the range and the prefix sums of the array are
+    the numbers of the copies on loan on each day. Only the books with
+    loans in the range are yielded, one at a time.
+    """
+    days = (date_to - date_from).days + 1
+
+    for book_id, events in groupby(
+        iter_loan_events(date_from, date_to, book_ids),
+        key=lambda event: event[0],
+    ):
+        difference = [0] * days
+
+        for _, day, delta in events:
+            difference[(day - date_from).days] += delta
+
+        yield book_id, list(accumulate(difference))
+
+
+def get_utilization(loans, copies):
+    if not copies:
+        return None
+
+    return round(loans / copies, 4)
+
+
+def iter_utilization_rows(date_from, date_to, book_ids=None):
+    """Yield the daily utilization rows of the books with loans"""
+    books = get_book_copies(book_ids)
+
+    for book_id, loans in iter_book_loans(date_from, date_to, book_ids):
+        title, copies = books.get(book_id, ("", 0))
+
+        for offset, count in enumerate(loans):
+            yield (
+                date_from + timedelta(days=offset),
+                book_id,
+                title,
+                count,
+                copies,
+                get_utilization(count, copies),
+            )
+
+
+def get_utilization_report(date_from, date_to, book_ids=None, limit=20):
+    """Return the most utilized books of the range with their series.
+
+    The books are ranked by the peak utilization, so the titles whose
+    copies all go out first are on top.
+    """
+    books = get_book_copies(book_ids)
+
+    def iter_summaries():
+        for book_id, loans in iter_book_loans(date_from, date_to, book_ids):
+            title, copies = books.get(book_id, ("", 0))
+            yield {
+                "id": book_id,
+                "title": title,
+                "copies": copies,
+                "peak_loans": max(loans),
+                "peak_utilization": get_utilization(max(loans), copies),
+                "average_utilization": get_utilization(
+                    sum(loans) / len(loans), copies
+                ),
+                "loans": loans,
+            }
+
+    # Only the top books are kept in memory, not the series of every book.
+    return heapq.nsmallest(
+        limit,
+        iter_summaries(),
+        key=lambda book: (
+            -(book["peak_utilization"] or 0),
+            -book["peak_loans"],
+            book["id"],
+        ),
+    )
@@ -1,20 +1,135 @@
+from datetime import timedelta
+
+from django.db.models import BooleanField, ExpressionWrapper, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status, mixins
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
-from borrowing.models import Borrowing
+from borrowing.models import (
+    BookCirculation,
+    Borrowing,
+    MonthlyCirculation,
+    ReaderActivity,
+    Reservation,
+)
+from borrowing.reservations import cancel_reservation
 from borrowing.serializers import (
     BorrowingSerializer,
     BorrowingListSerializer,
     BorrowingDetailSerializer,
     BorrowingReturnSerializer,
+    BorrowingBulkReturnSerializer,
+    BorrowingCheckoutSerializer,
+    ReservationSerializer,
+    ReservationListSerializer,
+    BookCirculationSerializer,
+    ReaderActivitySerializer,
+    MonthlyCirculationSerializer,
+)
+from borrowing.services import close_borrowing, close_borrowings
+from borrowing.utilization import (
+    MAX_UTILIZATION_DAYS,
+    get_utilization_report,
+)
+from library_service.export import export_response, get_export_format
+from library_service.fields import (
+    EXPAND_PARAMETER,
+    FIELDS_PARAMETER,
+    SparseFieldsMixin,
 )
+from library_service.ids import parse_id
+from library_service.pagination import (
+    CursorPaginationMixin,
+    KeysetPagination,
+)
+from library_service.rows import ValuesListMixin
+
+
+BORROWING_EXPORT_FIELDS = (
+    "id",
+    "borrow_date",
+    "expected_return_date",
+    "actual_return_date",
+    "book_id",
+    "book__title",
+    "user_id",
+    "user__email",
+    "is_active",
+    "is_overdue",
+    "overdue_since",
+    "accrued_fee",
+    "projected_fee",
+)
+BOOLEAN_VALUES = {"true": True, "false": False}
+
+
+def get_date_param(request, name):
+    value = request.query_params.get(name)
+
+    if not value:
+        return None
+
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+
+    if date is None:
+        raise ValidationError({name: "Use the YYYY-MM-DD date format."})
+
+    return date
+
+
+def get_limit_param(request, name, default, maximum):
+    value = request.query_params.get(name)
+
+    if not value:
+        return default
+
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+
+    if not 0 < limit <= maximum:
+        raise ValidationError({name: f"Use a number from 1 to {maximum}."})
+
+    return limit
+
+
+def get_boolean_param(request, name):
+    value = request.query_params.get(name)
+
+    if not value:
+        return None
+
+    if value.lower() not in BOOLEAN_VALUES:
+        raise ValidationError({name: "Use true or false."})
+
+    return BOOLEAN_VALUES[value.lower()]
+
+
+def get_id_param(request, name):
+    value = request.query_params.get(name)
+
+    if not value:
+        return None
+
+    pk = parse_id(value)
+
+    if pk is None:
+        raise ValidationError({name: "Use an id."})
+
+    return pk
 
 
 class BorrowingPagination(PageNumberPagination):
@@ -23,8 +138,24 @@ class BorrowingPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class BorrowingCursorPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("is_returned", "expected_return_date", "id")
+    keyset_annotations = {
+        "is_returned": ExpressionWrapper(
+            Q(is_active=False),
+            output_field=BooleanField(),
+        ),
+    }
+
+
 @extend_schema(tags=["Borrowings"])
 class BorrowingViewSet(
+    SparseFieldsMixin,
+    ValuesListMixin,
+    CursorPaginationMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -34,6 +165,7 @@ class BorrowingViewSet(
     serializer_class = BorrowingSerializer
     permission_classes = (IsAuthenticated,)
     pagination_class = BorrowingPagination
+    cursor_pagination_class = BorrowingCursorPagination
 
     def get_queryset(self):
         queryset = self.queryset
@@ -47,17 +179,31 @@ class BorrowingViewSet(
                 "user",
             )
 
-        if self.action == "list":
-            user_id = self.request.query_params.get("user_id")
-            is_active = self.request.query_params.get("is_active")
+        if self.action in ("list", "export"):
+            user_id = get_id_param(self.request, "user_id")
+            is_active = get_boolean_param(self.request, "is_active")
+            is_overdue = get_boolean_param(self.request, "is_overdue")
 
             if user_id:
                 queryset = queryset.filter(user_id=user_id)
 
-            if is_active:
-                queryset = queryset.filter(is_active=is_active.capitalize())
+            if is_active is not None:
+                queryset = queryset.filter(is_active=is_active)
 
-        return queryset
+            if is_overdue is not None:
+                queryset = queryset.filter(is_overdue=is_overdue)
+
+        if self.action == "export":
+            date_from = get_date_param(self.request, "date_from")
+            date_to = get_date_param(self.request, "date_to")
+
+            if date_from:
+                queryset = queryset.filter(borrow_date__gte=date_from)
+
+            if date_to:
+                queryset = queryset.filter(borrow_date__lte=date_to)
+
+        return self.get_sparse_queryset(queryset)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -69,6 +215,12 @@ class BorrowingViewSet(
         if self.action == "return_borrowing":
             return BorrowingReturnSerializer
 
+        if self.action == "return_borrowings":
+            return BorrowingBulkReturnSerializer
+
+        if self.action == "checkout":
+            return BorrowingCheckoutSerializer
+
         return BorrowingSerializer
 
     @action(
@@ -85,15 +237,7 @@ class BorrowingViewSet(
             pk=pk,
         )
 
-        if borrowing.is_active:
-            borrowing.actual_return_date = timezone.now().date()
-            borrowing.is_active = False
-            borrowing.save()
-
-            book = borrowing.book
-            book.inventory += 1
-            book.save()
-
+        if close_borrowing(borrowing):
             return Response(
                 {"success": "You have successfully returned the book."},
                 status=status.HTTP_200_OK,
@@ -104,6 +248,98 @@ class BorrowingViewSet(
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @extend_schema(responses={201: BorrowingSerializer(many=True)})
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="checkout",
+        permission_classes=[IsAuthenticated],
+    )
+    def checkout(self, request):
+        """Endpoint for borrowing several books in one request"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        borrowings = serializer.save()
+
+        return Response(
+            BorrowingSerializer(borrowings, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="return",
+        permission_classes=[IsAuthenticated],
+    )
+    def return_borrowings(self, request):
+        """Endpoint for returning many books to the library at once"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        statuses = close_borrowings(
+            request.user,
+            serializer.validated_data["ids"],
+        )
+
+        return Response(
+            {
+                "results": [
+                    {"id": borrowing_id, "status": borrowing_status}
+                    for borrowing_id, borrowing_status in statuses.items()
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="user_id",
+                type=int,
+                description="Filter by user id (ex. ?user_id=1)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="is_active",
+                type=bool,
+                description="Filter by borrowing status (ex. ?is_active=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="is_overdue",
+                type=bool,
+                description="Filter by overdue status (ex. ?is_overdue=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="pagination",
+                type=str,
+                enum=["page", "cursor"],
+                description="Use the keyset pagination, which follows "
+                            "the next/previous links and does not count "
+                            "the borrowings (ex. ?pagination=cursor)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                description="The pagination cursor value "
+                            "(used with ?pagination=cursor)",
+                required=False,
+            ),
+            FIELDS_PARAMETER,
+            EXPAND_PARAMETER,
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -118,7 +354,250 @@ class BorrowingViewSet(
                 description="Filter by borrowing status (ex. ?is_active=true)",
                 required=False,
             ),
+            OpenApiParameter(
+                name="is_overdue",
+                type=bool,
+                description="Filter by overdue status (ex. ?is_overdue=true)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="date_from",
+                type=OpenApiTypes.DATE,
+                description="Filter by borrow date from "
+                            "(ex. ?date_from=2023-01-01)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                type=OpenApiTypes.DATE,
+                description="Filter by borrow date to "
+                            "(ex. ?date_to=2023-12-31)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="file_format",
+                type=str,
+                enum=["csv", "ndjson"],
+                description="The file format, csv by default "
+                            "(ex. ?file_format=ndjson)",
+                required=False,
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """Endpoint for exporting the borrowings as a CSV or NDJSON file"""
+        return export_response(
+            self.get_queryset().order_by("id"),
+            BORROWING_EXPORT_FIELDS,
+            get_export_format(request),
+            "borrowings",
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="The size of the leaderboards, 10 by default "
+                            "(ex. ?limit=20)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="months",
+                type=int,
+                description="The number of the last months, 12 by default "
+                            "(ex. ?months=24)",
+                required=False,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="stats",
+        permission_classes=[IsAdminUser],
+    )
+    def stats(self, request):
+        """Endpoint for the borrowing leaderboards and monthly circulation"""
+        limit = get_limit_param(request, "limit", default=10, maximum=100)
+        months = get_limit_param(request, "months", default=12, maximum=120)
+
+        books = BookCirculation.objects.select_related("book").order_by(
+            "-borrow_count", "book"
+        )[:limit]
+        readers = ReaderActivity.objects.select_related("user").order_by(
+            "-borrow_count", "user"
+        )[:limit]
+        circulation = MonthlyCirculation.objects.all()[:months]
+
+        return Response(
+            {
+                "most_borrowed_books": BookCirculationSerializer(
+                    books, many=True
+                ).data,
+                "most_active_readers": ReaderActivitySerializer(
+                    readers, many=True
+                ).data,
+                "monthly_circulation": MonthlyCirculationSerializer(
+                    circulation, many=True
+                ).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="date_from",
+                type=OpenApiTypes.DATE,
+                description="The first day, 30 days before date_to "
+                            "by default (ex. ?date_from=2023-01-01)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="date_to",
+                type=OpenApiTypes.DATE,
+                description="The last day, today by default "
+                            "(ex. ?date_to=2023-12-31)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="book_id",
+                type=int,
+                description="Filter by book id (ex. ?book_id=1)",
+                required=False,
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="The number of the most utilized books, "
+                            "20 by default (ex. ?limit=50)",
+                required=False,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="utilization",
+        permission_classes=[IsAdminUser],
+    )
+    def utilization(self, request):
+        """Endpoint for the daily loans and utilization of the books"""
+        date_to = get_date_param(request, "date_to") or timezone.now().date()
+        date_from = get_date_param(request, "date_from") or (
+            date_to - timedelta(days=29)
+        )
+
+        if not 0 <= (date_to - date_from).days < MAX_UTILIZATION_DAYS:
+            raise ValidationError(
+                {
+                    "date_from": "The range must be from 1 to "
+                    f"{MAX_UTILIZATION_DAYS} days long."
+                }
+            )
+
+        book_id = get_id_param(request, "book_id")
+
+        return Response(
+            {
+                "date_from": date_from,
+                "date_to": date_to,
+                "books": get_utilization_report(
+                    date_from,
+                    date_to,
+                    book_ids=[book_id] if book_id else None,
+                    limit=get_limit_param(
+                        request, "limit", default=20, maximum=100
+                    ),
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+@extend_schema(tags=["Reservations"])
+class ReservationViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    queryset = Reservation.objects.all()
+    serializer_class = ReservationSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = BorrowingPagination
+
+    def get_queryset(self):
+        queryset = self.queryset
+
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+
+        if self.action == "list":
+            queryset = queryset.select_related("book", "user")
+            reservation_status = self.request.query_params.get("status")
+
+            if reservation_status:
+                queryset = queryset.filter(status=reservation_status.upper())
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ReservationListSerializer
+
+        return ReservationSerializer
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="status",
+                type=str,
+                enum=[value.lower() for value in Reservation.Status.values],
+                description="Filter by reservation status "
+                            "(ex. ?status=waiting)",
+                required=False,
+            ),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+    @extend_schema(request=None, responses={200: OpenApiTypes.OBJECT})
+    @action(
+        methods=["PATCH"],
+        detail=True,
+        url_path="cancel",
+        permission_classes=[IsAuthenticated],
+    )
+    def cancel(self, request, pk=None):
+        """Endpoint for leaving the book queue or giving up the held copy"""
+        reservation = get_object_or_404(
+            Reservation,
+            user=request.user,
+            pk=pk,
+        )
+
+        if cancel_reservation(reservation):
+            return Response(
+                {
+                    "success": "You have successfully cancelled "
+                    "the reservation."
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        return Response(
+            {"error": "The reservation is not open anymore!"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
@@ -0,0 +1,176 @@
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+FIELDS_PARAMETER = OpenApiParameter(
+    name=FIELDS_PARAM,
+    type=str,
+    description="Return only the listed fields, the related objects "
+                "are returned as ids unless expanded (ex. ?fields=id,title)",
+    required=False,
+)
+EXPAND_PARAMETER = OpenApiParameter(
+    name=EXPAND_PARAM,
+    type=str,
+    description="Embed the listed related objects, the others are "
+                "returned as ids when used (ex. ?expand=book)",
+    required=False,
+)
+
+
+def get_list_param(request, name):
+    """Split a comma separated query param, ex. ``?fields=id,title``."""
+    value = request.query_params.get(name)
+
+    if not value:
+        return None
+
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def select_related_only(queryset, related):
+    """Join only ``related``, ``select_related()`` alone joins them all."""
+    queryset = queryset.select_related(None)
+
+    if related:
+        queryset = queryset.select_related(*related)
+
+    return queryset
+
+
+class SparseFieldsSerializerMixin:
+    """Render only ``context["fields"]`` and expand ``context["expand"]``.
+
+    The serializer is unchanged when both of them are missing. Otherwise
+    the relations of ``expandable_fields`` are rendered as primary keys,
+    which are read without a join, unless they are expanded with their
+    nested serializer.
+    """
+
+    # The relation names mapped to the serializers of their expansions.
+    expandable_fields = {}
+    # The model fields read by the serializer fields with no model source.
+    field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get(FIELDS_PARAM)
+        expand = self.context.get(EXPAND_PARAM)
+
+        if fields is None and expand is None:
+            return
+
+        for name, serializer_class in self.expandable_fields.items():
+            if name not in self.fields:
+                continue
+
+            if name in (expand or ()):
+                self.fields[name] = serializer_class(read_only=True)
+            else:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True
+                )
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsMixin:
+    """Add ``?fields=`` and ``?expand=`` to the list and detail endpoints.
+
+    The queryset is cut down to the columns of the rendered fields with
+    ``only()``, and only the expanded relations are joined.
+    """
+
+    sparse_actions = ("list", "retrieve")
+
+    def get_sparse_params(self):
+        if self.action not in self.sparse_actions:
+            return None, None
+
+        return (
+            get_list_param(self.request, FIELDS_PARAM),
+            get_list_param(self.request, EXPAND_PARAM),
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields, expand = self.get_sparse_params()
+
+        if fields is not None or expand is not None:
+            context[FIELDS_PARAM] = fields
+            context[EXPAND_PARAM] = expand or []
+
+        return context
+
+    def validate_sparse_params(self, serializer_class, fields, expand):
+        unknown_fields = set(fields or ()) - set(serializer_class().fields)
+        unknown_expand = set(expand or ()) - set(
+            serializer_class.expandable_fields
+        )
+
+        if unknown_fields:
+            raise ValidationError(
+                {FIELDS_PARAM: f"Unknown fields: {sorted(unknown_fields)}."}
+            )
+
+        if unknown_expand:
+            raise ValidationError(
+                {EXPAND_PARAM: f"Cannot expand: {sorted(unknown_expand)}."}
+            )
+
+    def get_sparse_queryset(self, queryset):
+        fields, expand = self.get_sparse_params()
+        serializer_class = self.get_serializer_class()
+
+        if (fields is None and expand is None) or not issubclass(
+            serializer_class, SparseFieldsSerializerMixin
+        ):
+            return queryset
+
+        self.validate_sparse_params(serializer_class, fields, expand)
+        serializer = serializer_class(context=self.get_serializer_context())
+        only = {"pk"}
+        related = []
+
+        for name, field in serializer.fields.items():
+            if field.source == "*":
+                sources = serializer_class.field_sources.get(name)
+
+                if sources is None:
+                    # Nothing to cut down, the field may read any column.
+                    return select_related_only(queryset, expand or ())
+
+                only.update(sources)
+                continue
+
+            source = field.source.split(".")[0]
+
+            try:
+                queryset.model._meta.get_field(source)
+            except FieldDoesNotExist:
+                # An annotation, which is always selected.
+                continue
+
+            only.add(source)
+
+            if name in (expand or ()):
+                related.append(source)
+
+        # The keyset cursors are built from the ordering fields.
+        for ordering in getattr(self.paginator, "ordering", None) or ():
+            name = ordering.lstrip("-")
+
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+
+            only.add(name)
+
+        return select_related_only(queryset, related).only(*only)
@@ -0,0 +1,12 @@
+# Every primary key of the project is a BigAutoField.
+MAX_ID = 2**63 - 1
+
+
+def parse_id(value):
+    """Return the value as a primary key or None if it cannot be one"""
+    try:
+        pk = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return pk if 0 < pk <= MAX_ID else None
@@ -0,0 +1,184 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, Func, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowComparison(Func):
+    """Compare two rows of values, ex. ``(title, id) > ('Dune', 7)``."""
+
+    output_field = BooleanField()
+
+    def __init__(self, lhs, operator, rhs):
+        self.operator = operator
+        super().__init__(*lhs, *rhs)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sqls, params = [], []
+
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+
+        half = len(sqls) // 2
+        lhs, rhs = ", ".join(sqls[:half]), ", ".join(sqls[half:])
+        return f"({lhs}) {self.operator} ({rhs})", params
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that seeks by the whole ordering tuple.
+
+    ``CursorPagination`` seeks by the first ordering field only and skips
+    the ties with an offset. Here every page is fetched with
+    ``WHERE (a, b, id) > (...) ORDER BY a, b, id LIMIT n``, which is served
+    by a composite index on the ordering however deep the page is, and no
+    count query is run. The ordering fields must be non-nullable, sorted
+    in the same direction and end with a unique tie-breaker. Computed
+    ordering keys are declared in ``keyset_annotations``.
+    """
+
+    ordering = ("id",)
+    keyset_annotations = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.keys = [field.lstrip("-") for field in self.ordering]
+        self.descending = self.ordering[0].startswith("-")
+        self.cursor = self.decode_cursor(request)
+        queryset = queryset.annotate(**self.keyset_annotations)
+
+        if self.cursor is None:
+            is_reversed = False
+        else:
+            position, is_reversed = self.cursor
+            ascending = self.descending == is_reversed
+            queryset = queryset.filter(
+                RowComparison(
+                    self.keys,
+                    ">" if ascending else "<",
+                    self.get_position_values(queryset.model, position),
+                )
+            )
+
+        descending = self.descending != is_reversed
+        queryset = queryset.order_by(
+            *(f"-{key}" if descending else key for key in self.keys)
+        )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+
+        if is_reversed:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_position_values(self, model, position):
+        values = []
+
+        for key, value in zip(self.keys, position, strict=True):
+            if key in self.keyset_annotations:
+                field = self.keyset_annotations[key].output_field
+            else:
+                field = model._meta.get_field(key)
+
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message) from None
+
+            values.append(Value(value, output_field=field))
+
+        return values
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            # A row of a ``values()`` queryset.
+            return [instance[key] for key in self.keys]
+
+        return [getattr(instance, key) for key in self.keys]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(
+            (self.get_position(self.page[-1]), False)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor((self.get_position(self.page[0]), True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, is_reversed = data["p"], bool(data["r"])
+        except (TypeError, KeyError, ValueError):
+            # The binascii.Error and UnicodeDecodeError are ValueErrors.
+            raise NotFound(self.invalid_cursor_message) from None
+
+        if not isinstance(position, list) or len(position) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, is_reversed
+
+    def encode_cursor(self, cursor):
+        position, is_reversed = cursor
+        data = json.dumps(
+            {"p": position, "r": int(is_reversed)},
+            cls=DjangoJSONEncoder,
+        )
+        encoded = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded,
+        )
+
+
+class CursorPaginationMixin:
+    """Switch the list endpoint to keyset pagination on request.
+
+    The page number pagination stays the default, ``?pagination=cursor``
+    uses ``cursor_pagination_class`` instead.
+    """
+
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, "_paginator")
+            and self.cursor_pagination_class is not None
+            and self.request is not None
+            and self.request.query_params.get("pagination") == "cursor"
+        ):
+            self._paginator = self.cursor_pagination_class()
+
+        return super().paginator
@@ -0,0 +1,39 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render the same compact JSON as DRF several times faster.
+
+    The datetimes are passed to the DRF encoder, which formats them its
+    own way. The indented output of the browsable API and the data orjson
+    cannot encode, such as the integers over 64 bits, are left to the
+    standard renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # The line and paragraph separators are escaped like in DRF.
+        return ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+            PARAGRAPH_SEPARATOR, b"\\u2029"
+        )
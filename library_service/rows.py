@@ -0,0 +1,182 @@
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# The fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+# The fields that format a database value the same way as a model value.
+CONVERTED_FIELDS = (
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.UUIDField,
+)
+
+
+def resolve_lookup(model, source):
+    """Return the ``values()`` lookup and the model field of a source."""
+    parts = source.split(".")
+
+    for part in parts[:-1]:
+        field = model._meta.get_field(part)
+
+        if not field.is_relation:
+            raise FieldDoesNotExist(source)
+
+        model = field.related_model
+
+    return "__".join(parts), model._meta.get_field(parts[-1])
+
+
+def build_instance_getter(model, sources):
+    def get_instance(row):
+        return model(**{source: row[source] for source in sources})
+
+    return get_instance
+
+
+class ValuesRowBuilder:
+    """Build the serializer output from ``values()`` rows.
+
+    The serializer fields are compiled once into the ``values()`` lookups
+    and the ``(name, getter, converter)`` columns, so a row is built with
+    a few item lookups instead of the attribute access and the field
+    machinery of DRF. The fields that cannot be built from the database
+    values the same way make ``compile()`` return None.
+    """
+
+    def __init__(self, lookups, columns):
+        self.lookups = lookups
+        self.columns = columns
+
+    @classmethod
+    def compile(cls, serializer, queryset):
+        model = queryset.model
+        annotations = queryset.query.annotation_select
+        lookups = []
+        columns = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if field.source == "*":
+                sources = getattr(serializer, "field_sources", {}).get(name)
+
+                if sources is None or not isinstance(
+                    field, serializers.SerializerMethodField
+                ):
+                    return None
+
+                lookups.extend(sources)
+                columns.append(
+                    (
+                        name,
+                        build_instance_getter(model, sources),
+                        field.to_representation,
+                    )
+                )
+                continue
+
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                if field.pk_field is not None:
+                    return None
+
+                converter = None
+            elif isinstance(field, IDENTITY_FIELDS):
+                converter = None
+            elif isinstance(field, CONVERTED_FIELDS):
+                converter = field.to_representation
+            else:
+                return None
+
+            if field.source in annotations:
+                lookup = field.source
+            else:
+                try:
+                    lookup, model_field = resolve_lookup(model, field.source)
+                except FieldDoesNotExist:
+                    if hasattr(model, field.source_attrs[0]):
+                        # A property or a method of the model.
+                        return None
+
+                    # A missing annotation, DRF skips the read only field.
+                    if field.read_only:
+                        continue
+
+                    return None
+
+                if model_field.is_relation != isinstance(
+                    field, serializers.PrimaryKeyRelatedField
+                ) or model_field.many_to_many or model_field.one_to_many:
+                    # Only the foreign keys are rendered from their ids.
+                    return None
+
+            lookups.append(lookup)
+            columns.append((name, itemgetter(lookup), converter))
+
+        return cls(list(dict.fromkeys(lookups)), columns)
+
+    def build(self, rows):
+        data = []
+
+        for row in rows:
+            item = {}
+
+            for name, get_value, converter in self.columns:
+                value = get_value(row)
+
+                if value is not None and converter is not None:
+                    value = converter(value)
+
+                item[name] = value
+
+            data.append(item)
+
+        return data
+
+
+class ValuesListMixin:
+    """Serve the list endpoint from ``values()`` rows when possible.
+
+    The output is the same as the one of the list serializer, which is
+    still used when ``ValuesRowBuilder`` cannot compile it.
+    """
+
+    def get_values_lookups(self, row_builder):
+        lookups = list(row_builder.lookups)
+        paginator = self.paginator
+        annotations = getattr(paginator, "keyset_annotations", {})
+
+        # The keyset cursors are read from the rows.
+        for ordering in getattr(paginator, "ordering", None) or ():
+            key = ordering.lstrip("-")
+
+            if key not in annotations and key not in lookups:
+                lookups.append(key)
+
+        return lookups
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        row_builder = ValuesRowBuilder.compile(self.get_serializer(), queryset)
+
+        if row_builder is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = queryset.values(*self.get_values_lookups(row_builder))
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            return self.get_paginated_response(row_builder.build(page))
+
+        return Response(row_builder.build(queryset))
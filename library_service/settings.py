@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework_simplejwt",
     "rest_framework_simplejwt.token_blacklist",
     "rest_framework",
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     "user",
     "book",
     "borrowing",
+    "notification",
 ]
 
 MIDDLEWARE = [
@@ -91,6 +93,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "books": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://broker:6379/1",
+    },
+}
+
+BOOK_CACHE_ALIAS = "books"
+BOOK_CACHE_TIMEOUT = int(os.getenv("BOOK_CACHE_TIMEOUT", 300))
+
+# Reservations
+
+RESERVATION_HOLD_HOURS = int(os.getenv("RESERVATION_HOLD_HOURS", 48))
+
+# Notifications
+
+# The seconds to collect the messages for a digest, 0 disables digests.
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv("NOTIFICATION_DIGEST_WINDOW", 60))
+NOTIFICATION_DIGEST_SIZE = int(os.getenv("NOTIFICATION_DIGEST_SIZE", 50))
+BORROWING_REMINDER_DAYS = int(os.getenv("BORROWING_REMINDER_DAYS", 2))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -149,6 +179,10 @@ REST_FRAMEWORK = {
         "anon": "100/day",
         "user": "1000/day",
     },
+    "DEFAULT_RENDERER_CLASSES": [
+        "library_service.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
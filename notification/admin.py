@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from notification.models import OutboxMessage
+
+admin.site.register(OutboxMessage)
@@ -0,0 +1,236 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Telegram allows about 30 messages per second to all the chats,
+# one per second to a private chat and 20 per minute to a group.
+GLOBAL_RATE = (30, 1)
+PRIVATE_CHAT_RATE = (1, 1)
+GROUP_CHAT_RATE = (20, 60)
+MAX_WORKERS = 8
+MAX_RETRIES = 4
+BACKOFF = 0.5
+MAX_BACKOFF = 30
+TIMEOUT = httpx.Timeout(10, connect=5)
+
+
+class NotificationError(Exception):
+    pass
+
+
+def split_message(lines, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Join the lines into messages no longer than ``limit`` characters.
+
+    The lines are kept whole unless a single line is over the limit.
+    """
+    message = ""
+
+    for line in lines:
+        while len(line) > limit:
+            if message:
+                yield message
+                message = ""
+
+            yield line[:limit]
+            line = line[limit:]
+
+        if message and len(message) + len(line) + 1 > limit:
+            yield message
+            message = ""
+
+        message = f"{message}\n{line}" if message else line
+
+    if message:
+        yield message
+
+
+class RateLimiter:
+    """Space the calls evenly at ``count`` calls per ``period`` seconds.
+
+    Every caller reserves the next free slot under the lock and sleeps
+    until the slot outside of it, so the threads wait concurrently.
+    """
+
+    def __init__(self, count, period, clock=time.monotonic, sleep=time.sleep):
+        self.interval = period / count
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = self.clock()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+
+        if delay > 0:
+            self.sleep(delay)
+
+
+class TelegramDispatcher:
+    """Send the bot messages over one pooled HTTP client.
+
+    The messages of a chat are sent in order, the different chats are
+    served concurrently by ``max_workers`` threads within the global and
+    the per chat rate limits of Telegram. The network errors, the server
+    errors and the 429 responses are retried with backoff, the other
+    errors are raised at once. The ``transport`` of httpx can be replaced,
+    ex. with ``httpx.MockTransport`` or a stub server behind ``api_url``.
+    """
+
+    def __init__(
+        self,
+        token,
+        api_url=TELEGRAM_API_URL,
+        transport=None,
+        max_workers=MAX_WORKERS,
+        max_retries=MAX_RETRIES,
+        backoff=BACKOFF,
+        sleep=time.sleep,
+    ):
+        self.client = httpx.Client(
+            base_url=f"{api_url}/bot{token}",
+            transport=transport,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(max_connections=max_workers),
+        )
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.global_limiter = RateLimiter(*GLOBAL_RATE, sleep=sleep)
+        self.chat_limiters = {}
+        self.lock = threading.Lock()
+
+    def get_chat_limiter(self, chat_id):
+        with self.lock:
+            if chat_id not in self.chat_limiters:
+                # The group and channel ids are negative.
+                rate = (
+                    GROUP_CHAT_RATE
+                    if str(chat_id).startswith("-")
+                    else PRIVATE_CHAT_RATE
+                )
+                self.chat_limiters[chat_id] = RateLimiter(
+                    *rate, sleep=self.sleep
+                )
+
+            return self.chat_limiters[chat_id]
+
+    def get_retry_delay(self, attempt, response=None):
+        if response is not None and response.status_code == 429:
+            try:
+                return response.json()["parameters"]["retry_after"]
+            except (ValueError, KeyError, TypeError):
+                pass
+
+        return min(self.backoff * 2**attempt, MAX_BACKOFF)
+
+    def post(self, chat_id, text):
+        for attempt in range(self.max_retries + 1):
+            self.get_chat_limiter(chat_id).wait()
+            self.global_limiter.wait()
+            response = None
+
+            try:
+                response = self.client.post(
+                    "/sendMessage",
+                    json={"chat_id": chat_id, "text": text},
+                )
+            except httpx.TransportError as error:
+                reason = repr(error)
+            else:
+                if response.status_code == 200:
+                    return response.json()["result"]
+
+                if response.status_code != 429 and response.status_code < 500:
+                    raise NotificationError(
+                        f"Telegram rejected the message to {chat_id}: "
+                        f"{response.status_code} {response.text}"
+                    )
+
+                reason = f"{response.status_code} {response.text}"
+
+            if attempt < self.max_retries:
+                delay = self.get_retry_delay(attempt, response)
+                logger.warning(
+                    "Retrying the message to %s in %s s: %s",
+                    chat_id,
+                    delay,
+                    reason,
+                )
+                self.sleep(delay)
+
+        raise NotificationError(
+            f"Cannot send the message to {chat_id} "
+            f"after {self.max_retries + 1} attempts: {reason}"
+        )
+
+    def send(self, chat_id, text):
+        """Send the text as one or several messages to the chat"""
+        return [
+            self.post(chat_id, message)
+            for message in split_message(text.split("\n"))
+        ]
+
+    def send_many(self, messages):
+        """Send the ``(chat_id, text)`` messages, the chats concurrently.
+
+        All the chats are attempted, the errors of the failed ones are
+        returned by their chat ids.
+        """
+        chats = defaultdict(list)
+
+        for chat_id, text in messages:
+            chats[chat_id].append(text)
+
+        def send_chat(chat_id, texts):
+            return [self.send(chat_id, text) for text in texts]
+
+        with ThreadPoolExecutor(
+            min(self.max_workers, len(chats) or 1)
+        ) as executor:
+            futures = [
+                executor.submit(send_chat, chat_id, texts)
+                for chat_id, texts in chats.items()
+            ]
+
+        return {
+            chat_id: future.exception()
+            for chat_id, future in zip(chats, futures, strict=True)
+            if future.exception() is not None
+        }
+
+    def close(self):
+        self.client.close()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the dispatcher of the process, its connections are reused"""
+    global _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = TelegramDispatcher(
+                os.getenv("TELEGRAM_BOT_TOKEN"),
+                api_url=os.getenv("TELEGRAM_API_URL", TELEGRAM_API_URL),
+            )
+
+        return _dispatcher
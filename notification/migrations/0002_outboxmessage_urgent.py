@@ -0,0 +1,17 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notification", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="urgent",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+def delete_digest_schedule(apps, schema_editor):
+    # The digests are flushed by the outbox drain now.
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(
+        func="notification.digest.flush_expired_digest"
+    ).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0014_schedule_cluster"),
+        ("notification", "0002_outboxmessage_urgent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="digest_id",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                condition=models.Q(("sent_at__isnull", True)),
+                fields=["digest_id"],
+                name="outbox_digest_idx",
+            ),
+        ),
+        migrations.RunPython(
+            delete_digest_schedule,
+            migrations.RunPython.noop,
+        ),
+    ]
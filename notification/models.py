@@ -0,0 +1,33 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    message = models.TextField()
+    key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    urgent = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    digest_id = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=Q(sent_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+            models.Index(
+                fields=["digest_id"],
+                condition=Q(sent_at__isnull=True),
+                name="outbox_digest_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.message[:50]
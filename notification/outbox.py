@@ -0,0 +1,239 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from notification.models import OutboxMessage
+from notification.services import send_notification
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 10
+OUTBOX_TIME_LIMIT = 40
+OUTBOX_LEASE = timedelta(minutes=5)
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETRY_DELAY = timedelta(minutes=1)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+OUTBOX_RETENTION = timedelta(days=7)
+
+
+def enqueue_notification(message, key=None, urgent=False):
+    """Write the message to the outbox in the current transaction.
+
+    The message is only sent when the transaction commits, and the drain
+    is started after the commit, so no broker call is made while the
+    transaction holds its locks. A message with an already used ``key``
+    is dropped, so a retried event is not announced twice. The messages
+    that are not ``urgent`` are sent in the digests.
+    """
+    OutboxMessage.objects.bulk_create(
+        [OutboxMessage(message=message, key=key, urgent=urgent)],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: async_task(drain_outbox))
+
+
+def get_retry_delay(attempts):
+    return min(
+        OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        OUTBOX_MAX_RETRY_DELAY,
+    )
+
+
+def get_pending_messages(now):
+    return OutboxMessage.objects.filter(
+        sent_at__isnull=True,
+        available_at__lte=now,
+        attempts__lt=OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def lease_messages(pending, now, batch_size, **fields):
+    """Lease a batch of the pending messages and return them.
+
+    The rows are locked with ``FOR UPDATE SKIP LOCKED`` only while their
+    ``available_at`` is moved past the lease, and the lease is committed
+    before any message is sent, so no transaction stays open during the
+    sending and the parallel drains never pick the same message.
+    """
+    messages = list(
+        pending.select_for_update(skip_locked=True)
+        .order_by("available_at", "id")
+        .only("id", "message", "attempts")[:batch_size]
+    )
+    OutboxMessage.objects.filter(
+        pk__in=[message.id for message in messages]
+    ).update(available_at=now + OUTBOX_LEASE, **fields)
+
+    return messages
+
+
+def claim_outbox_messages(batch_size):
+    """Lease a batch of the messages sent on their own.
+
+    Only the urgent messages are sent on their own while the digests are
+    enabled, the others wait for ``claim_digest``.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        pending = get_pending_messages(now)
+
+        if settings.NOTIFICATION_DIGEST_WINDOW:
+            pending = pending.filter(urgent=True)
+
+        return lease_messages(pending, now, batch_size)
+
+
+def is_digest_due(now):
+    """Return whether the digest is full or its oldest message is old"""
+    pending = get_pending_messages(now).filter(urgent=False)
+    size = settings.NOTIFICATION_DIGEST_SIZE
+    window = timedelta(seconds=settings.NOTIFICATION_DIGEST_WINDOW)
+
+    return (
+        pending.filter(created_at__lte=now - window).exists()
+        or pending[:size].count() >= size
+    )
+
+
+def claim_digest():
+    """Lease the messages of the next due digest, return its id and them.
+
+    The leased rows share a new ``digest_id``, so the digest is kept in
+    the outbox: its messages are marked as sent only once the digest is
+    delivered, and they are leased again when the worker dies before.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+
+        if not is_digest_due(now):
+            return None, []
+
+        digest_id = uuid.uuid4()
+        messages = lease_messages(
+            get_pending_messages(now).filter(urgent=False),
+            now,
+            settings.NOTIFICATION_DIGEST_SIZE,
+            digest_id=digest_id,
+        )
+
+    return digest_id, messages
+
+
+def record_failure(message, error):
+    """Put the message back for a retry with backoff"""
+    attempts = message.attempts + 1
+    OutboxMessage.objects.filter(pk=message.id).update(
+        attempts=attempts,
+        available_at=timezone.now() + get_retry_delay(attempts),
+        last_error=str(error),
+        digest_id=None,
+    )
+
+
+def send_outbox_message(message):
+    """Send the leased message and record the result in its own UPDATE.
+
+    Any error of the sending counts as a failed attempt, so a message is
+    never marked as sent before it is delivered.
+    """
+    try:
+        send_notification(message.message)
+    except Exception as error:
+        logger.warning(
+            "Cannot send the outbox message %s: %s", message.id, error
+        )
+        record_failure(message, error)
+        return False
+
+    OutboxMessage.objects.filter(pk=message.id).update(
+        sent_at=timezone.now()
+    )
+    return True
+
+
+def format_digest(messages):
+    if len(messages) == 1:
+        return messages[0]
+
+    return "\n".join([f"{len(messages)} library events:", *messages])
+
+
+def send_digest(digest_id, messages):
+    """Send the leased messages as one digest, return their number.
+
+    The messages are marked as sent by their ``digest_id``, so the rows
+    leased again by another worker after the lease is over are left to
+    that worker.
+    """
+    try:
+        send_notification(
+            format_digest([message.message for message in messages])
+        )
+    except Exception as error:
+        logger.warning("Cannot send the digest %s: %s", digest_id, error)
+
+        for message in messages:
+            record_failure(message, error)
+
+        return 0
+
+    OutboxMessage.objects.filter(
+        digest_id=digest_id, sent_at__isnull=True
+    ).update(sent_at=timezone.now())
+    return len(messages)
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, time_limit=OUTBOX_TIME_LIMIT):
+    """Send the pending outbox messages and the due digests.
+
+    Return the number of the messages sent. Every message is marked as
+    sent right after it is delivered, on its own or in a digest, so it is
+    sent at least once: it is sent again only when the worker dies
+    between the delivery and the UPDATE. The leased messages of a killed
+    worker are picked again when their lease is over. The drain stops
+    after ``time_limit`` seconds, below the task timeout, and gives the
+    rest of its batch back. The failed messages are retried with backoff.
+    """
+    deadline = time.monotonic() + time_limit
+    sent = 0
+
+    while time.monotonic() < deadline:
+        messages = claim_outbox_messages(batch_size)
+
+        if not messages:
+            break
+
+        for i, message in enumerate(messages):
+            if time.monotonic() >= deadline:
+                OutboxMessage.objects.filter(
+                    pk__in=[message.id for message in messages[i:]]
+                ).update(available_at=timezone.now())
+                break
+
+            sent += send_outbox_message(message)
+
+    while (
+        settings.NOTIFICATION_DIGEST_WINDOW
+        and time.monotonic() < deadline
+    ):
+        digest_id, messages = claim_digest()
+
+        if not messages:
+            break
+
+        sent += send_digest(digest_id, messages)
+
+    return sent
+
+
+def purge_outbox(retention=OUTBOX_RETENTION):
+    """Delete the messages sent before the retention period"""
+    return OutboxMessage.objects.filter(
+        sent_at__lt=timezone.now() - retention
+    ).delete()[0]
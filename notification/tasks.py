@@ -6,30 +6,39 @@ from django.utils import timezone
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_service.settings")
 django.setup()
 
+from django.contrib.postgres.aggregates import ArrayAgg
 from django_q.tasks import async_task
 
+from notification.dispatcher import split_message
 from notification.services import send_notification
 from borrowing.models import Borrowing
 
 
-def send_borrowings_list_notification():
-    borrowings = Borrowing.objects.filter(
-        is_active=True,
-        expected_return_date__lt=timezone.now().date(),
+def get_overdue_borrowers():
+    """Return the overdue book titles grouped by the borrower in SQL"""
+    return (
+        Borrowing.objects.filter(
+            is_active=True,
+            expected_return_date__lt=timezone.now().date(),
+        )
+        .values("user__email")
+        .annotate(titles=ArrayAgg("book__title", ordering="book__title"))
+        .order_by("user__email")
+        .values_list("user__email", "titles")
     )
 
-    if borrowings:
-        borrowers = {borrowing.user.email: [] for borrowing in borrowings}
 
-        for borrowing in borrowings:
-            borrowers[borrowing.user.email].append(borrowing.book.title)
+def send_borrowings_list_notification():
+    lines = (
+        f"{email} still has not returned the books: {', '.join(titles)}."
+        for email, titles in get_overdue_borrowers().iterator(chunk_size=2000)
+    )
+    messages = 0
 
-        data = [
-            f"\n{email} still has not returned the books: {', '.join(titles)}."
-            for email, titles in borrowers.items()
-        ]
-        message = "".join(data)
+    for message in split_message(lines):
         async_task(send_notification, message)
-    else:
+        messages += 1
+
+    if not messages:
         message = "No borrowings are overdue today!"
         async_task(send_notification, message)
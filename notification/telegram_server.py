@@ -1,8 +1,16 @@
+import asyncio
+import hashlib
 import logging
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import django
+from asgiref.sync import sync_to_async
 from dotenv import load_dotenv
 from telegram import Update
+from telegram.constants import ChatType
 from telegram.ext import (
     ApplicationBuilder,
     ContextTypes,
@@ -13,34 +21,284 @@ from telegram.ext import (
 
 load_dotenv()
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "library_service.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import close_old_connections  # noqa: E402
+
+from book.cache import (  # noqa: E402
+    DETAIL_VERSION_KEY,
+    LIST_VERSION_KEY,
+    get_cache,
+    get_version,
 )
+from book.models import Book  # noqa: E402
+from book.search import search_books  # noqa: E402
+from borrowing.models import Borrowing, Reservation  # noqa: E402
+from library_service.ids import parse_id  # noqa: E402
+from user.telegram import link_telegram_chat  # noqa: E402
 
+CONCURRENT_UPDATES = 256
+CONNECTION_POOL_SIZE = 64
+DB_WORKERS = 8
+QUERY_TIMEOUT = 5
+SEARCH_LIMIT = 5
+TIMEOUT_MESSAGE = "The library is busy right now, please try again later."
+PRIVATE_CHAT_MESSAGE = "Link your account from a private chat with the bot."
 
-async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await context.bot.send_message(
-        chat_id=update.effective_chat.id,
-        text="Welcome to the Library Service API!",
+executor = ThreadPoolExecutor(
+    max_workers=DB_WORKERS,
+    thread_name_prefix="telegram-db",
+)
+
+
+def run_query(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def query(func, *args):
+    """Run the synchronous query in the pool of the database threads.
+
+    The event loop is never blocked, and the pool bounds the database
+    connections of the bot however many chats query it at once. A query
+    that waits longer than ``QUERY_TIMEOUT`` raises ``TimeoutError``.
+    """
+    return await asyncio.wait_for(
+        sync_to_async(run_query, thread_sensitive=False, executor=executor)(
+            func, *args
+        ),
+        QUERY_TIMEOUT,
     )
 
 
-async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def get_cached(key, build):
+    cache = get_cache()
+    entry = cache.get(key)
+
+    if entry is None:
+        entry = (build(),)
+        cache.set(key, entry, settings.BOOK_CACHE_TIMEOUT)
+
+    return entry[0]
+
+
+def find_books(term):
+    """Return the books matching the term, cached with the book lists"""
+    version = get_version(LIST_VERSION_KEY)
+    term_hash = hashlib.md5(term.lower().encode()).hexdigest()
+
+    return get_cached(
+        f"book:list:{version}:telegram:{term_hash}",
+        lambda: list(
+            search_books(Book.objects.all(), term).values_list(
+                "id", "title", "author", "inventory"
+            )[:SEARCH_LIMIT]
+        ),
+    )
+
+
+def get_availability(book_id):
+    """Return the title, the inventory and the queue of the book or None.
+
+    The answer is cached with the book details, so it is dropped whenever
+    a copy of the book is borrowed or returned.
+    """
+    version = get_version(DETAIL_VERSION_KEY.format(pk=book_id))
+
+    def build():
+        book = (
+            Book.objects.filter(pk=book_id)
+            .values_list("title", "inventory")
+            .first()
+        )
+
+        if book is None:
+            return None
+
+        waiting = Reservation.objects.filter(
+            book_id=book_id, status=Reservation.Status.WAITING
+        ).count()
+        return (*book, waiting)
+
+    return get_cached(f"book:{book_id}:{version}:telegram", build)
+
+
+def get_chat_borrowings(chat_id):
+    return list(
+        Borrowing.objects.filter(
+            user__telegram_chat_id=chat_id, is_active=True
+        )
+        .order_by("expected_return_date", "id")
+        .values_list("book__title", "expected_return_date", "overdue_since")
+    )
+
+
+def format_link(user):
+    if user is None:
+        return "The link is invalid or expired, request a new one."
+
+    return f"The chat is linked to {user.email}."
+
+
+def format_books(books):
+    if not books:
+        return "No books found."
+
+    return "\n".join(
+        f"{book_id}. '{title}' by {author}, {inventory} available"
+        for book_id, title, author, inventory in books
+    )
+
+
+def format_availability(availability):
+    if availability is None:
+        return "The book is not found."
+
+    title, inventory, waiting = availability
+
+    if inventory:
+        return f"'{title}': {inventory} copies available."
+
+    return f"'{title}': no copies available, {waiting} patrons waiting."
+
+
+def format_borrowings(borrowings):
+    if not borrowings:
+        return "You have no borrowed books."
+
+    return "\n".join(
+        f"'{title}' is overdue since {overdue_since:%Y-%m-%d}."
+        if overdue_since
+        else f"'{title}' is due on {due_date:%Y-%m-%d}."
+        for title, due_date, overdue_since in borrowings
+    )
+
+
+def parse_book_id(args):
+    """Return the book id of the command args or None if it is invalid"""
+    if len(args) != 1:
+        return None
+
+    return parse_id(args[0])
+
+
+async def reply(update: Update, context: ContextTypes.DEFAULT_TYPE, text):
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
-        text=update.message.text,
+        text=text,
+    )
+
+
+async def reply_with_query(update, context, func, *args, formatter):
+    try:
+        result = await query(func, *args)
+    except asyncio.TimeoutError:
+        await reply(update, context, TIMEOUT_MESSAGE)
+        return
+
+    await reply(update, context, formatter(result))
+
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if context.args:
+        await link_chat(update, context, context.args[0])
+        return
+
+    await reply(
+        update,
+        context,
+        "Welcome to the Library Service API!\n"
+        "/search <title> - find the books\n"
+        "/available <id> - check the copies of the book\n"
+        "/my_borrowings - list your borrowed books",
     )
 
 
-if __name__ == '__main__':
+async def link_chat(update, context, token):
+    if update.effective_chat.type != ChatType.PRIVATE:
+        await reply(update, context, PRIVATE_CHAT_MESSAGE)
+        return
+
+    await reply_with_query(
+        update,
+        context,
+        link_telegram_chat,
+        token,
+        update.effective_chat.id,
+        formatter=format_link,
+    )
+
+
+async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    term = " ".join(context.args).strip()
+
+    if not term:
+        await reply(update, context, "Usage: /search <title>")
+        return
+
+    await reply_with_query(
+        update, context, find_books, term, formatter=format_books
+    )
+
+
+async def available(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    book_id = parse_book_id(context.args)
+
+    if book_id is None:
+        await reply(update, context, "Usage: /available <id>")
+        return
+
+    await reply_with_query(
+        update,
+        context,
+        get_availability,
+        book_id,
+        formatter=format_availability,
+    )
+
+
+async def my_borrowings(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await reply_with_query(
+        update,
+        context,
+        get_chat_borrowings,
+        update.effective_chat.id,
+        formatter=format_borrowings,
+    )
+
+
+async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await reply(update, context, update.message.text)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+
     application = (
-        ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+        ApplicationBuilder()
+        .token(os.getenv("TELEGRAM_BOT_TOKEN"))
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .connection_pool_size(CONNECTION_POOL_SIZE)
+        .build()
     )
     start_handler = CommandHandler("start", start)
+    search_handler = CommandHandler("search", search)
+    available_handler = CommandHandler("available", available)
+    my_borrowings_handler = CommandHandler("my_borrowings", my_borrowings)
     echo_handler = MessageHandler(filters.TEXT & (~filters.COMMAND), echo)
 
     application.add_handler(start_handler)
+    application.add_handler(search_handler)
+    application.add_handler(available_handler)
+    application.add_handler(my_borrowings_handler)
     application.add_handler(echo_handler)
 
     application.run_polling()
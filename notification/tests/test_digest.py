@@ -0,0 +1,110 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notification.dispatcher import NotificationError
+from notification.models import OutboxMessage
+from notification.outbox import drain_outbox
+
+
+@override_settings(NOTIFICATION_DIGEST_WINDOW=60, NOTIFICATION_DIGEST_SIZE=3)
+@mock.patch("notification.outbox.send_notification")
+class DigestTests(TestCase):
+    def create_messages(self, count, **kwargs):
+        return [
+            OutboxMessage.objects.create(message=f"Message {i}", **kwargs)
+            for i in range(count)
+        ]
+
+    def test_messages_are_sent_in_one_digest(self, send_notification):
+        self.create_messages(3)
+
+        self.assertEquals(drain_outbox(), 3)
+        send_notification.assert_called_once_with(
+            "3 library events:\nMessage 0\nMessage 1\nMessage 2"
+        )
+        self.assertEquals(
+            OutboxMessage.objects.filter(sent_at__isnull=True).count(), 0
+        )
+        self.assertEquals(
+            OutboxMessage.objects.values("digest_id").distinct().count(), 1
+        )
+
+    def test_digest_waits_for_its_window(self, send_notification):
+        self.create_messages(2)
+
+        self.assertEquals(drain_outbox(), 0)
+        send_notification.assert_not_called()
+
+        OutboxMessage.objects.update(
+            created_at=timezone.now() - timedelta(seconds=60)
+        )
+
+        self.assertEquals(drain_outbox(), 2)
+        send_notification.assert_called_once_with(
+            "2 library events:\nMessage 0\nMessage 1"
+        )
+
+    def test_urgent_message_skips_digest(self, send_notification):
+        OutboxMessage.objects.create(message="Message")
+        OutboxMessage.objects.create(message="Urgent", urgent=True)
+
+        self.assertEquals(drain_outbox(), 1)
+        send_notification.assert_called_once_with("Urgent")
+        self.assertEquals(
+            list(
+                OutboxMessage.objects.filter(
+                    sent_at__isnull=True
+                ).values_list("message", flat=True)
+            ),
+            ["Message"],
+        )
+
+    def test_failed_digest_is_kept_in_outbox(self, send_notification):
+        send_notification.side_effect = NotificationError("Bad Gateway")
+        self.create_messages(3)
+
+        self.assertEquals(drain_outbox(), 0)
+
+        for message in OutboxMessage.objects.all():
+            self.assertIsNone(message.sent_at)
+            self.assertIsNone(message.digest_id)
+            self.assertEquals(message.attempts, 1)
+            self.assertEquals(message.last_error, "Bad Gateway")
+            self.assertGreater(message.available_at, timezone.now())
+
+        send_notification.side_effect = None
+        OutboxMessage.objects.update(available_at=timezone.now())
+
+        self.assertEquals(drain_outbox(), 3)
+
+    def test_any_error_is_a_failed_attempt(self, send_notification):
+        send_notification.side_effect = RuntimeError("Timeout")
+        self.create_messages(3)
+
+        self.assertEquals(drain_outbox(), 0)
+        self.assertEquals(
+            OutboxMessage.objects.filter(attempts=1, sent_at=None).count(), 3
+        )
+
+    def test_expired_lease_is_sent_again(self, send_notification):
+        self.create_messages(3)
+        OutboxMessage.objects.update(
+            digest_id="00000000-0000-0000-0000-000000000001"
+        )
+
+        self.assertEquals(drain_outbox(), 3)
+        self.assertFalse(
+            OutboxMessage.objects.filter(
+                digest_id="00000000-0000-0000-0000-000000000001"
+            ).exists()
+        )
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW=0)
+    def test_digest_can_be_disabled(self, send_notification):
+        OutboxMessage.objects.create(message="Message")
+
+        self.assertEquals(drain_outbox(), 1)
+        send_notification.assert_called_once_with("Message")
@@ -0,0 +1,234 @@
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
+
+import httpx
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from book.models import Book
+from borrowing.models import Borrowing
+from notification.dispatcher import (
+    NotificationError,
+    RateLimiter,
+    TelegramDispatcher,
+    split_message,
+)
+from notification.tasks import send_borrowings_list_notification
+
+
+class SplitMessageTests(SimpleTestCase):
+    def test_lines_are_joined_under_the_limit(self):
+        messages = list(split_message(["a" * 4, "b" * 4, "c" * 4], limit=9))
+
+        self.assertEquals(messages, ["aaaa\nbbbb", "cccc"])
+
+    def test_long_line_is_split(self):
+        messages = list(split_message(["a" * 2, "b" * 7], limit=3))
+
+        self.assertEquals(messages, ["aa", "bbb", "bbb", "b"])
+        self.assertTrue(all(len(message) <= 3 for message in messages))
+
+    def test_no_lines(self):
+        self.assertEquals(list(split_message([])), [])
+
+
+class TelegramStub:
+    """Answer the bot API calls with the queued responses or OK."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        with self.lock:
+            self.requests.append(
+                (request.url.path, json.loads(request.content))
+            )
+
+            if self.responses:
+                response = self.responses.pop(0)
+
+                if isinstance(response, Exception):
+                    raise response
+
+                return response
+
+        return httpx.Response(200, json={"ok": True, "result": {}})
+
+    def texts(self, chat_id=None):
+        return [
+            payload["text"]
+            for _, payload in self.requests
+            if chat_id is None or payload["chat_id"] == chat_id
+        ]
+
+
+class TelegramDispatcherTests(SimpleTestCase):
+    def get_dispatcher(self, stub):
+        return TelegramDispatcher(
+            "token",
+            transport=httpx.MockTransport(stub),
+            sleep=lambda delay: None,
+        )
+
+    def test_message_is_sent_as_json(self):
+        stub = TelegramStub()
+
+        self.get_dispatcher(stub).send("1", "Books & borrowings #1?")
+
+        self.assertEquals(
+            stub.requests,
+            [
+                (
+                    "/bottoken/sendMessage",
+                    {"chat_id": "1", "text": "Books & borrowings #1?"},
+                )
+            ],
+        )
+
+    def test_long_message_is_split(self):
+        stub = TelegramStub()
+        text = "\n".join(["a" * 3000, "b" * 3000])
+
+        self.get_dispatcher(stub).send("1", text)
+
+        self.assertEquals(stub.texts(), ["a" * 3000, "b" * 3000])
+
+    def test_server_errors_are_retried(self):
+        stub = TelegramStub(
+            httpx.ConnectError("refused"),
+            httpx.Response(502, text="Bad Gateway"),
+        )
+
+        with self.assertLogs("notification.dispatcher") as logs:
+            self.get_dispatcher(stub).send("1", "Hello")
+
+        self.assertEquals(stub.texts(), ["Hello"] * 3)
+        self.assertIn("in 0.5 s", logs.output[0])
+        self.assertIn("in 1.0 s", logs.output[1])
+
+    def test_rate_limit_is_respected(self):
+        stub = TelegramStub(
+            httpx.Response(
+                429,
+                json={
+                    "ok": False,
+                    "error_code": 429,
+                    "parameters": {"retry_after": 7},
+                },
+            )
+        )
+
+        with self.assertLogs("notification.dispatcher") as logs:
+            self.get_dispatcher(stub).send("1", "Hello")
+
+        self.assertIn("in 7 s", logs.output[0])
+        self.assertEquals(stub.texts(), ["Hello"] * 2)
+
+    def test_client_error_is_not_retried(self):
+        stub = TelegramStub(httpx.Response(400, json={"ok": False}))
+
+        with self.assertRaises(NotificationError):
+            self.get_dispatcher(stub).send("1", "Hello")
+
+        self.assertEquals(len(stub.requests), 1)
+
+    def test_retries_are_limited(self):
+        stub = TelegramStub(*[httpx.Response(500)] * 5)
+
+        with self.assertRaises(NotificationError):
+            self.get_dispatcher(stub).send("1", "Hello")
+
+        self.assertEquals(len(stub.requests), 5)
+
+    def test_send_many_keeps_chat_order(self):
+        stub = TelegramStub()
+        messages = [
+            (chat_id, f"{chat_id}-{i}")
+            for i in range(5)
+            for chat_id in ("1", "2", "-3")
+        ]
+
+        self.get_dispatcher(stub).send_many(messages)
+
+        for chat_id in ("1", "2", "-3"):
+            self.assertEquals(
+                stub.texts(chat_id),
+                [f"{chat_id}-{i}" for i in range(5)],
+            )
+
+    def test_send_many_returns_failed_chats(self):
+        stub = TelegramStub(httpx.Response(403, json={"ok": False}))
+
+        errors = self.get_dispatcher(stub).send_many([("1", "Hello")])
+
+        self.assertEquals(list(errors), ["1"])
+        self.assertIsInstance(errors["1"], NotificationError)
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_calls_are_spaced(self):
+        delays = []
+        limiter = RateLimiter(2, 1, clock=lambda: 10.0, sleep=delays.append)
+
+        for _ in range(3):
+            limiter.wait()
+
+        self.assertEquals(delays, [0.5, 1.0])
+
+
+@mock.patch("notification.tasks.async_task")
+class OverdueReportTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.books = [
+            Book.objects.create(
+                title=f"Title {i}",
+                author=f"Author {i}",
+                cover="HARD",
+                inventory=5,
+                daily_fee="1.99",
+            )
+            for i in range(3)
+        ]
+
+    def create_borrowing(self, book, days, is_active=True):
+        return Borrowing.objects.create(
+            expected_return_date=timezone.now().date() + timedelta(days=days),
+            book=book,
+            user=self.user,
+            is_active=is_active,
+        )
+
+    def test_no_overdue_borrowings(self, async_task):
+        self.create_borrowing(self.books[0], days=2)
+        self.create_borrowing(self.books[1], days=-2, is_active=False)
+
+        send_borrowings_list_notification()
+
+        async_task.assert_called_once()
+        self.assertEquals(
+            async_task.call_args.args[1], "No borrowings are overdue today!"
+        )
+
+    def test_overdue_titles_are_grouped_by_borrower(self, async_task):
+        self.create_borrowing(self.books[1], days=-1)
+        self.create_borrowing(self.books[0], days=-3)
+        self.create_borrowing(self.books[2], days=2)
+
+        send_borrowings_list_notification()
+
+        async_task.assert_called_once()
+        self.assertEquals(
+            async_task.call_args.args[1],
+            "test@test.com still has not returned the books: "
+            "Title 0, Title 1.",
+        )
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notification.dispatcher import NotificationError
+from notification.models import OutboxMessage
+from notification.outbox import (
+    drain_outbox,
+    enqueue_notification,
+    purge_outbox,
+)
+
+
+@mock.patch("notification.outbox.async_task")
+class EnqueueNotificationTests(TestCase):
+    def test_message_is_written_in_transaction(self, async_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                enqueue_notification("Hello")
+
+                async_task.assert_not_called()
+
+        self.assertEquals(
+            list(OutboxMessage.objects.values_list("message", flat=True)),
+            ["Hello"],
+        )
+        async_task.assert_called_once_with(drain_outbox)
+
+    def test_rolled_back_message_is_dropped(self, async_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    enqueue_notification("Hello")
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertFalse(OutboxMessage.objects.exists())
+        async_task.assert_not_called()
+
+    def test_duplicate_key_is_dropped(self, async_task):
+        enqueue_notification("Hello", key="borrowing:1")
+        enqueue_notification("Hello again", key="borrowing:1")
+
+        self.assertEquals(
+            list(OutboxMessage.objects.values_list("message", flat=True)),
+            ["Hello"],
+        )
+
+
+@override_settings(NOTIFICATION_DIGEST_WINDOW=0)
+@mock.patch("notification.outbox.send_notification")
+class DrainOutboxTests(TestCase):
+    def test_messages_are_sent_once(self, send_notification):
+        for i in range(5):
+            OutboxMessage.objects.create(message=f"Message {i}")
+
+        self.assertEquals(drain_outbox(batch_size=2), 5)
+        self.assertEquals(drain_outbox(batch_size=2), 0)
+        self.assertEquals(
+            [call.args for call in send_notification.call_args_list],
+            [(f"Message {i}",) for i in range(5)],
+        )
+        self.assertFalse(
+            OutboxMessage.objects.filter(sent_at__isnull=True).exists()
+        )
+
+    def test_failed_message_is_retried_later(self, send_notification):
+        send_notification.side_effect = NotificationError("Bad Gateway")
+        message = OutboxMessage.objects.create(message="Hello")
+
+        self.assertEquals(drain_outbox(), 0)
+
+        message.refresh_from_db()
+        self.assertEquals(message.attempts, 1)
+        self.assertEquals(message.last_error, "Bad Gateway")
+        self.assertIsNone(message.sent_at)
+        self.assertGreater(message.available_at, timezone.now())
+
+        send_notification.side_effect = None
+        OutboxMessage.objects.update(available_at=timezone.now())
+
+        self.assertEquals(drain_outbox(), 1)
+
+    def test_any_error_is_a_failed_attempt(self, send_notification):
+        send_notification.side_effect = [None, RuntimeError("Timeout")]
+        first = OutboxMessage.objects.create(message="First")
+        second = OutboxMessage.objects.create(message="Second")
+
+        self.assertEquals(drain_outbox(), 1)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertIsNotNone(first.sent_at)
+        self.assertIsNone(second.sent_at)
+        self.assertEquals(second.attempts, 1)
+        self.assertEquals(second.last_error, "Timeout")
+        self.assertGreater(second.available_at, timezone.now())
+
+        send_notification.side_effect = None
+        OutboxMessage.objects.update(available_at=timezone.now())
+
+        self.assertEquals(drain_outbox(), 1)
+        self.assertEquals(send_notification.call_args.args[0], "Second")
+
+    @mock.patch("notification.outbox.time.monotonic")
+    def test_drain_stops_at_time_limit(
+        self, monotonic, send_notification
+    ):
+        monotonic.side_effect = [0, 0, 0, 10, 10]
+        OutboxMessage.objects.create(message="First")
+        second = OutboxMessage.objects.create(message="Second")
+
+        self.assertEquals(drain_outbox(time_limit=5), 1)
+
+        second.refresh_from_db()
+        self.assertIsNone(second.sent_at)
+        self.assertLessEqual(second.available_at, timezone.now())
+
+    def test_purge_sent_messages(self, send_notification):
+        OutboxMessage.objects.create(
+            message="Old",
+            sent_at=timezone.now() - timedelta(days=8),
+        )
+        OutboxMessage.objects.create(message="Pending")
+
+        self.assertEquals(purge_outbox(), 1)
+        self.assertEquals(
+            list(OutboxMessage.objects.values_list("message", flat=True)),
+            ["Pending"],
+        )
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from book.cache import invalidate_book_cache
+from book.models import Book
+from borrowing.models import Borrowing
+from notification import telegram_server
+from notification.telegram_server import (
+    available,
+    get_availability,
+    get_chat_borrowings,
+    my_borrowings,
+    search,
+    start,
+)
+from user.telegram import link_telegram_chat
+
+
+def get_update(chat_id=101, chat_type="private"):
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id, type=chat_type)
+    )
+
+
+def get_context(*args):
+    return SimpleNamespace(
+        args=list(args),
+        bot=SimpleNamespace(send_message=mock.AsyncMock()),
+    )
+
+
+@mock.patch("notification.telegram_server.query")
+class BotCommandTests(SimpleTestCase):
+    async def test_search(self, query):
+        query.return_value = [(1, "Dune", "Frank Herbert", 3)]
+        context = get_context("dune", "messiah")
+
+        await search(get_update(), context)
+
+        query.assert_awaited_once_with(
+            telegram_server.find_books, "dune messiah"
+        )
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text="1. 'Dune' by Frank Herbert, 3 available",
+        )
+
+    async def test_search_without_title(self, query):
+        context = get_context()
+
+        await search(get_update(), context)
+
+        query.assert_not_awaited()
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text="Usage: /search <title>",
+        )
+
+    async def test_available(self, query):
+        query.return_value = ("Dune", 0, 2)
+        context = get_context("7")
+
+        await available(get_update(), context)
+
+        query.assert_awaited_once_with(telegram_server.get_availability, 7)
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text="'Dune': no copies available, 2 patrons waiting.",
+        )
+
+    async def test_available_with_invalid_id(self, query):
+        for book_id in ("seven", "0", "\u00b2", "99999999999999999999"):
+            context = get_context(book_id)
+
+            await available(get_update(), context)
+
+            query.assert_not_awaited()
+            context.bot.send_message.assert_awaited_once_with(
+                chat_id=101,
+                text="Usage: /available <id>",
+            )
+
+    async def test_my_borrowings(self, query):
+        query.return_value = [
+            ("Dune", date(2024, 1, 2), date(2024, 1, 3)),
+            ("Emma", date(2024, 1, 9), None),
+        ]
+        context = get_context()
+
+        await my_borrowings(get_update(chat_id=202), context)
+
+        query.assert_awaited_once_with(
+            telegram_server.get_chat_borrowings, 202
+        )
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=202,
+            text="'Dune' is overdue since 2024-01-03.\n"
+            "'Emma' is due on 2024-01-09.",
+        )
+
+    async def test_start_links_chat(self, query):
+        query.return_value = SimpleNamespace(email="reader@test.com")
+        context = get_context("token")
+
+        await start(get_update(), context)
+
+        query.assert_awaited_once_with(link_telegram_chat, "token", 101)
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text="The chat is linked to reader@test.com.",
+        )
+
+    async def test_start_does_not_link_group(self, query):
+        context = get_context("token")
+
+        await start(get_update(chat_type="group"), context)
+
+        query.assert_not_awaited()
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text=telegram_server.PRIVATE_CHAT_MESSAGE,
+        )
+
+    async def test_slow_query(self, query):
+        query.side_effect = asyncio.TimeoutError
+        context = get_context()
+
+        await my_borrowings(get_update(), context)
+
+        context.bot.send_message.assert_awaited_once_with(
+            chat_id=101,
+            text=telegram_server.TIMEOUT_MESSAGE,
+        )
+
+
+class BotQueryTests(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Dune",
+            author="Frank Herbert",
+            cover="HARD",
+            inventory=3,
+            daily_fee="1.99",
+        )
+
+    def test_availability_is_cached_until_invalidated(self):
+        self.assertEquals(get_availability(self.book.id), ("Dune", 3, 0))
+
+        Book.objects.filter(pk=self.book.id).update(inventory=2)
+
+        self.assertEquals(get_availability(self.book.id), ("Dune", 3, 0))
+
+        invalidate_book_cache(self.book.id)
+
+        self.assertEquals(get_availability(self.book.id), ("Dune", 2, 0))
+
+    def test_missing_book(self):
+        self.assertIsNone(get_availability(self.book.id + 1))
+
+    def test_chat_borrowings(self):
+        user = get_user_model().objects.create_user(
+            "reader@test.com", "test_pass", telegram_chat_id=101
+        )
+        other_user = get_user_model().objects.create_user(
+            "other@test.com", "test_pass", telegram_chat_id=102
+        )
+        due_date = timezone.now().date() + timedelta(days=3)
+        Borrowing.objects.create(
+            user=user, book=self.book, expected_return_date=due_date
+        )
+        Borrowing.objects.create(
+            user=other_user, book=self.book, expected_return_date=due_date
+        )
+
+        self.assertEquals(
+            get_chat_borrowings(101), [("Dune", due_date, None)]
+        )
+        self.assertEquals(get_chat_borrowings(103), [])
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="telegram_chat_id",
+            field=models.BigIntegerField(
+                blank=True,
+                null=True,
+                unique=True,
+                verbose_name="Telegram chat id",
+            ),
+        ),
+    ]
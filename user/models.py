@@ -43,6 +43,12 @@ class UserManager(BaseUserManager):
 class User(AbstractUser):
     username = None
     email = models.EmailField(_("email address"), unique=True)
+    telegram_chat_id = models.BigIntegerField(
+        _("Telegram chat id"),
+        unique=True,
+        null=True,
+        blank=True,
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
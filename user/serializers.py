@@ -10,10 +10,11 @@ class UserSerializer(serializers.ModelSerializer):
             "email",
             "first_name",
             "last_name",
+            "telegram_chat_id",
             "password",
             "is_staff",
         )
-        read_only_fields = ("is_staff",)
+        read_only_fields = ("is_staff", "telegram_chat_id")
         extra_kwargs = {"password": {"write_only": True, "min_length": 8}}
 
     def create(self, validated_data):
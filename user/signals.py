@@ -14,3 +14,61 @@ def create_schedules(sender, **kwargs):
                 repeats=-1,
                 schedule_type=Schedule.DAILY,
             )
+
+        if not Schedule.objects.filter(name="overdue borrowings").exists():
+            schedule(
+                func="borrowing.services.mark_overdue_borrowings",
+                name="overdue borrowings",
+                repeats=-1,
+                schedule_type=Schedule.DAILY,
+            )
+
+        if not Schedule.objects.filter(name="borrowing fees").exists():
+            schedule(
+                func="borrowing.fees.accrue_borrowing_fees",
+                name="borrowing fees",
+                repeats=-1,
+                schedule_type=Schedule.DAILY,
+            )
+
+        if not Schedule.objects.filter(name="borrowing partitions").exists():
+            schedule(
+                func="borrowing.partitions.create_returned_partitions",
+                name="borrowing partitions",
+                repeats=-1,
+                schedule_type=Schedule.MONTHLY,
+            )
+
+        if not Schedule.objects.filter(name="expired holds").exists():
+            schedule(
+                func="borrowing.reservations.reclaim_expired_holds",
+                name="expired holds",
+                repeats=-1,
+                schedule_type=Schedule.MINUTES,
+                minutes=15,
+            )
+
+        if not Schedule.objects.filter(name="notification outbox").exists():
+            schedule(
+                func="notification.outbox.drain_outbox",
+                name="notification outbox",
+                repeats=-1,
+                schedule_type=Schedule.MINUTES,
+                minutes=1,
+            )
+
+        if not Schedule.objects.filter(name="outbox cleanup").exists():
+            schedule(
+                func="notification.outbox.purge_outbox",
+                name="outbox cleanup",
+                repeats=-1,
+                schedule_type=Schedule.DAILY,
+            )
+
+        if not Schedule.objects.filter(name="due reminders").exists():
+            schedule(
+                func="borrowing.reminders.send_due_reminders",
+                name="due reminders",
+                repeats=-1,
+                schedule_type=Schedule.DAILY,
+            )
@@ -0,0 +1,74 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+from library_service.ids import MAX_ID
+
+LINK_TOKEN_SALT = "user.telegram.link"
+LINK_TOKEN_TIMEOUT = 60 * 60
+
+
+def make_link_hash(user, timestamp):
+    """Hash the user with the current chat, so a used token is invalid"""
+    return salted_hmac(
+        LINK_TOKEN_SALT,
+        f"{user.pk}:{user.telegram_chat_id}:{timestamp}",
+        algorithm="sha256",
+    ).hexdigest()[:32]
+
+
+def make_link_token(user):
+    """Return the token the user sends to the bot as ``/start <token>``.
+
+    It fits the deep link start parameter of Telegram: up to 64 letters,
+    digits, underscores and hyphens.
+    """
+    timestamp = int(time.time())
+    return (
+        f"{int_to_base36(user.pk)}-{int_to_base36(timestamp)}-"
+        f"{make_link_hash(user, timestamp)}"
+    )
+
+
+def link_telegram_chat(token, chat_id):
+    """Link the chat to the user of the token, return the user or None.
+
+    The chat id comes from Telegram, so only the owner of the chat can
+    link it. The token expires after ``LINK_TOKEN_TIMEOUT`` seconds and is
+    used once: linking changes the hashed chat of the user. A chat linked
+    to another account before is moved to this one.
+    """
+    try:
+        pk, timestamp, link_hash = token.split("-")
+        pk, timestamp = base36_to_int(pk), base36_to_int(timestamp)
+    except ValueError:
+        return None
+
+    if pk > MAX_ID or not (
+        0 <= time.time() - timestamp <= LINK_TOKEN_TIMEOUT
+    ):
+        return None
+
+    with transaction.atomic():
+        user = (
+            get_user_model()
+            .objects.select_for_update()
+            .filter(pk=pk)
+            .first()
+        )
+
+        if user is None or not constant_time_compare(
+            link_hash, make_link_hash(user, timestamp)
+        ):
+            return None
+
+        get_user_model().objects.filter(telegram_chat_id=chat_id).exclude(
+            pk=user.pk
+        ).update(telegram_chat_id=None)
+        user.telegram_chat_id = chat_id
+        user.save(update_fields=["telegram_chat_id"])
+
+    return user
@@ -1,14 +1,24 @@
+import time
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
+from django.utils.http import int_to_base36
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from user.serializers import UserSerializer
+from user.telegram import (
+    LINK_TOKEN_TIMEOUT,
+    link_telegram_chat,
+    make_link_token,
+)
 
 USER_CREATE_URL = reverse("user:create_user")
 USER_MANAGE_URL = reverse("user:manage_user")
+TELEGRAM_LINK_URL = reverse("user:telegram_link")
 
 
 class UnauthenticatedUserApiTests(TestCase):
@@ -79,3 +89,78 @@ class AuthenticatedUserApiTests(TestCase):
 
         self.assertEquals(res.status_code, status.HTTP_200_OK)
         self.assertEquals(payload["first_name"], self.user.first_name)
+
+    def test_telegram_chat_id_is_read_only(self):
+        res = self.client.patch(USER_MANAGE_URL, {"telegram_chat_id": 101})
+        self.user.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(self.user.telegram_chat_id)
+
+    def test_link_telegram_chat(self):
+        res = self.client.post(TELEGRAM_LINK_URL)
+        token = res.data["command"].removeprefix("/start ")
+
+        self.assertEquals(res.status_code, status.HTTP_201_CREATED)
+        self.assertLessEqual(len(token), 64)
+        self.assertEquals(link_telegram_chat(token, 101), self.user)
+
+        self.user.refresh_from_db()
+        self.assertEquals(self.user.telegram_chat_id, 101)
+
+        res = self.client.delete(TELEGRAM_LINK_URL)
+        self.user.refresh_from_db()
+
+        self.assertEquals(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(self.user.telegram_chat_id)
+
+
+class TelegramLinkTokenTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@email.com",
+            "test_password",
+        )
+
+    def test_token_is_used_once(self):
+        token = make_link_token(self.user)
+
+        self.assertEquals(link_telegram_chat(token, 101), self.user)
+        self.assertIsNone(link_telegram_chat(token, 102))
+
+        self.user.refresh_from_db()
+        self.assertEquals(self.user.telegram_chat_id, 101)
+
+    def test_expired_token(self):
+        token = make_link_token(self.user)
+
+        with mock.patch(
+            "user.telegram.time.time",
+            return_value=time.time() + LINK_TOKEN_TIMEOUT + 1,
+        ):
+            self.assertIsNone(link_telegram_chat(token, 101))
+
+    def test_invalid_token(self):
+        token = make_link_token(self.user)
+        other_user = get_user_model().objects.create_user(
+            "other@email.com",
+            "test_password",
+        )
+        _, rest = token.split("-", 1)
+        forged = f"{int_to_base36(other_user.pk)}-{rest}"
+
+        for value in ("", "bad", "a-b-c", forged, "z" * 13 + "-" + rest):
+            self.assertIsNone(link_telegram_chat(value, 101))
+
+    def test_chat_is_moved_from_other_user(self):
+        get_user_model().objects.create_user(
+            "other@email.com",
+            "test_password",
+            telegram_chat_id=101,
+        )
+
+        link_telegram_chat(make_link_token(self.user), 101)
+
+        self.assertEquals(
+            get_user_model().objects.get(telegram_chat_id=101), self.user
+        )
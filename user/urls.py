@@ -9,11 +9,17 @@ from user.views import (
     CreateUserView,
     ManageUserView,
     LogoutView,
+    TelegramLinkView,
 )
 
 urlpatterns = [
     path("", CreateUserView.as_view(), name="create_user"),
     path("me/", ManageUserView.as_view(), name="manage_user"),
+    path(
+        "me/telegram/",
+        TelegramLinkView.as_view(),
+        name="telegram_link",
+    ),
     path("logout/", LogoutView.as_view(), name="logout"),
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
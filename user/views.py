@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from user.serializers import UserSerializer
+from user.telegram import LINK_TOKEN_TIMEOUT, make_link_token
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -31,3 +32,30 @@ class LogoutView(APIView):
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception:
             return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+class TelegramLinkView(APIView):
+    """Link the Telegram chat of the user through the bot.
+
+    The issued token is sent to the bot as ``/start <token>`` from the
+    chat to be linked, so nobody links a chat that is not theirs.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+        token = make_link_token(request.user)
+
+        return Response(
+            {
+                "command": f"/start {token}",
+                "expires_in": LINK_TOKEN_TIMEOUT,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def delete(self, request):
+        request.user.telegram_chat_id = None
+        request.user.save(update_fields=["telegram_chat_id"])
+
+        return Response(status=status.HTTP_204_NO_CONTENT)